@@ -0,0 +1,203 @@
+"""Microbenchmarks for Auto-Nudge's parse / evaluate / serialize hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.bench --output benchmarks/results/baseline.json
+    python -m benchmarks.bench --compare benchmarks/results/baseline.json
+
+Results are written as JSON so that runs from different versions can be compared. --compare exits with a non-zero
+status if any benchmark regressed by more than --threshold.
+
+Feed benchmarks run against a real SOFA feed snapshot, benchmarks/fixtures/macos_data_feed.json, saved by
+benchmarks.fetch_fixture. Without one, they fall back to a generated feed that only shares the real feed's schema,
+and the results are tagged as synthetic.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pydantic
+
+import main
+import nudge_config_codec
+from models.macos_sofa_feed import MacSofaFeed, SlimMacSofaFeed
+from models.nudge_config import NudgeConfig
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+FEED_FIXTURE = FIXTURES_DIR / "macos_data_feed.json"
+SYNTHETIC_FEED_FIXTURE = FIXTURES_DIR / "synthetic_macos_data_feed.json"
+CONFIG_FIXTURE = REPO_ROOT / "v1" / "nudge_config.json"
+FEED_SCALES = (1, 8)
+
+
+def scale_feed(feed: dict, scale: int) -> dict:
+    """Grows a feed's release history and device catalog, simulating the feed as Apple's history gets longer.
+
+    Args:
+        feed (dict): The raw feed to scale.
+        scale (int): How many copies of each security release and model to keep.
+
+    Returns:
+        dict: The scaled feed.
+    """
+    scaled = copy.deepcopy(feed)
+    for os_version in scaled["OSVersions"]:
+        releases = os_version["SecurityReleases"]
+        os_version["SecurityReleases"] = releases + [
+            dict(release, ProductVersion=f"{release['ProductVersion']}-{copy_index}")
+            for copy_index in range(1, scale)
+            for release in releases[1:]
+        ]
+    scaled["Models"] = {
+        f"{identifier}-{copy_index}" if copy_index else identifier: model
+        for copy_index in range(scale)
+        for identifier, model in feed["Models"].items()
+    }
+
+    return scaled
+
+
+def feed_fixture() -> Path:
+    """Returns the real SOFA feed snapshot if one has been fetched, otherwise the synthetic feed."""
+    if FEED_FIXTURE.is_file():
+        return FEED_FIXTURE
+
+    print(
+        f"No SOFA feed snapshot at {FEED_FIXTURE}, using the synthetic feed. Fetch one with benchmarks.fetch_fixture."
+    )
+    return SYNTHETIC_FEED_FIXTURE
+
+
+def build_benchmarks(fixture: Path) -> Dict[str, Callable[[], object]]:
+    """Builds the set of benchmarks to run, keyed by name."""
+    raw_feed = json.loads(fixture.read_text(encoding="utf-8"))
+    raw_config = CONFIG_FIXTURE.read_text(encoding="utf-8")
+    config = NudgeConfig.model_validate_json(raw_config, strict=True)
+    feed = MacSofaFeed.model_validate(raw_feed)
+
+    benchmarks: Dict[str, Callable[[], object]] = {}
+    for scale in FEED_SCALES:
+        feed_json = json.dumps(scale_feed(raw_feed, scale))
+        benchmarks[f"feed_validate_full[x{scale}]"] = lambda body=feed_json: MacSofaFeed.model_validate_json(body)
+        benchmarks[f"feed_validate_slim[x{scale}]"] = lambda body=feed_json: SlimMacSofaFeed.model_validate_json(body)
+
+    benchmarks["config_validate"] = lambda: NudgeConfig.model_validate_json(raw_config, strict=True)
+    benchmarks["config_dump"] = lambda: config.model_dump_json(indent=4, exclude_none=True, by_alias=True)
+    if nudge_config_codec.orjson is not None:
+        raw_config_bytes = raw_config.encode("utf-8")
+        benchmarks["config_validate_orjson"] = lambda: nudge_config_codec.loads_nudge_config(raw_config_bytes, "orjson")
+        benchmarks["config_dump_orjson"] = lambda: nudge_config_codec.dumps_nudge_config(config, "orjson")
+    benchmarks["is_within_blackout"] = lambda: main.is_within_blackout(config)
+    benchmarks["update_config"] = lambda: main.update_config(feed, config.model_copy(deep=True), force=True)
+
+    return benchmarks
+
+
+def run_benchmark(func: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    """Times a benchmark, calibrating the number of calls per sample so each sample takes at least min_time."""
+    timer = timeit.Timer(func)
+    # Pipeline functions report their progress with print(), which would otherwise dominate the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 2
+        samples = [sample / number for sample in timer.repeat(repeat=repeat, number=number)]
+
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Prints a comparison of two result sets and returns the names of benchmarks that regressed."""
+    regressions = []
+    print(f"{'benchmark':<30} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            print(f"{name:<30} {'-':>12} {result['min_s'] * 1e6:>10.1f}us {'new':>8}")
+            continue
+
+        change = result["min_s"] / previous["min_s"] - 1
+        flag = " !" if change > threshold else ""
+        print(f"{name:<30} {previous['min_s'] * 1e6:>10.1f}us {result['min_s'] * 1e6:>10.1f}us {change:>+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def main_cli(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Compare results against a previously saved JSON result file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown treated as a regression")
+    parser.add_argument("--repeat", type=int, default=7, help="Samples taken per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum duration of a sample, in seconds")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this string")
+    args = parser.parse_args(argv)
+
+    fixture = feed_fixture()
+    results = {
+        "meta": {
+            "feed_fixture": fixture.name,
+            "feed_update_hash": json.loads(fixture.read_bytes())["UpdateHash"],
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pydantic": pydantic.VERSION,
+            "platform": platform.platform(),
+        },
+        "benchmarks": {},
+    }
+
+    for name, func in build_benchmarks(fixture).items():
+        if args.filter not in name:
+            continue
+        result = run_benchmark(func, args.repeat, args.min_time)
+        results["benchmarks"][name] = result
+        print(f"{name:<30} {result['min_s'] * 1e6:>10.1f}us (median {result['median_s'] * 1e6:.1f}us)")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=4), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        print("")
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline["meta"].get("feed_update_hash") != results["meta"]["feed_update_hash"]:
+            print("Warning: the baseline was measured against a different feed fixture, so feed timings differ")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
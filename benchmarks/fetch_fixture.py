@@ -0,0 +1,39 @@
+"""Saves the live SOFA macOS feed as the benchmark fixture.
+
+The feed is validated and written exactly as downloaded, so benchmarks run against a real feed's shape and size.
+Commit the refreshed fixture together with a new baseline, as feed timings aren't comparable across fixtures.
+
+Run from the repository root:
+
+    python -m benchmarks.fetch_fixture
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+import main
+from benchmarks.bench import FEED_FIXTURE
+from file_utils import write_atomic
+from models.macos_sofa_feed import MacSofaFeed
+
+
+def main_cli(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=main.MACOS_SOFA_FEED_URL, help="SOFA feed to save")
+    parser.add_argument("--output", type=Path, default=FEED_FIXTURE, help="Path to save the feed to")
+    args = parser.parse_args(argv)
+
+    res = main.get_session().get(args.url, timeout=main.REQUEST_TIMEOUT)
+    res.raise_for_status()
+    feed = MacSofaFeed.model_validate_json(res.content)
+
+    write_atomic(args.output, res.content)
+    print(f"Saved SOFA feed release {feed.update_hash} ({len(res.content)} bytes) to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
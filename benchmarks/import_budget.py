@@ -0,0 +1,86 @@
+"""Import-time budget check for main.py.
+
+Every scheduled run is a cold interpreter start, and most runs end right after the SOFA feed hash check. This check
+imports main under `python -X importtime` and fails if startup exceeds the budget, or if any module that should only
+be loaded on the update path is imported eagerly.
+
+Run from the repository root:
+
+    python -m benchmarks.import_budget --budget-ms 400
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules which must only be imported once a run reaches the update path
+LAZY_MODULES = [
+    "num2words",
+    "models.nudge_config",
+    "models.macos_sofa_feed",
+]
+
+
+def measure_import(module: str) -> Dict[str, int]:
+    """Imports a module in a fresh interpreter, returning the cumulative import time of every module in microseconds.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        Dict[str, int]: Cumulative import time keyed by module name.
+    """
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings: Dict[str, int] = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = int(cumulative)
+
+    return timings
+
+
+def main_cli(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main", help="Module whose import time is checked")
+    parser.add_argument(
+        "--budget-ms", type=float, default=400.0, help="Maximum cumulative import time, in milliseconds"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Imports to measure; the fastest one is used")
+    args = parser.parse_args(argv)
+
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda timings: timings[args.module])
+    total_ms = best[args.module] / 1000
+
+    print(f"Slowest imports for {args.module}:")
+    for name, cumulative in sorted(best.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+    print(f"import {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in best]
+    if eager:
+        print(f"Modules imported eagerly that should be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"Import time exceeds budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,165 @@
+"""Equivalence check for the Nudge configuration JSON codecs.
+
+Loads and dumps Nudge configurations through both the orjson and the pydantic codecs in nudge_config_codec, and
+fails if they ever disagree: every dump must be byte-for-byte identical, every load must produce equal models, and
+malformed documents must be rejected by both. Besides the given configurations, seeded random variants are generated
+whose strings, numbers and optional sections are replaced with edge cases such as emoji, escapes, control characters,
+non-BMP characters and empty or missing values.
+
+Run from the repository root:
+
+    python -m checks.codec_equivalence --variants 500
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+from pydantic import ValidationError
+
+import nudge_config_codec
+from nudge_config_codec import dumps_nudge_config, loads_nudge_config
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CONFIG_FIXTURE = REPO_ROOT / "v1" / "nudge_config.json"
+
+EDGE_STRINGS = [
+    "",
+    " ",
+    "⚠️  Updates must be installed prior to 31 October 2026  ⚠️",
+    'quote " backslash \\ slash /',
+    "line\nbreak\ttab\rreturn\bbackspace\fformfeed",
+    "".join(chr(code) for code in range(0x20)),
+    "\x7f delete and \u0085 next line",
+    "\u2028 line and \u2029 paragraph separators",
+    "non-BMP 𝔘𝔫𝔦𝔠𝔬𝔡𝔢 🧑‍💻 👩🏽‍🚀",
+    "combining e\u0301 and zero\u200bwidth",
+    "Ünïcödé Straße 東京 مرحبا",
+    "{install_deadline}",
+    "   ",
+    "x" * 1000,
+]
+EDGE_INTS = [0, 1, -1, 2**31 - 1, -(2**31), 2**53, -(2**53), 2**63 - 1, -(2**63)]
+MALFORMED_DOCUMENTS = [
+    b"",
+    b"{",
+    b"[]",
+    b"null",
+    b'{"osVersionRequirements": "not a list"}',
+    b'{"userExperience": {"elapsedRefreshCycle": "300"}}',
+    b'{"userExperience": {"elapsedRefreshCycle": 3.5}}',
+    b'{"optionalFeatures": {"asynchronousSoftwareUpdate": 1}}',
+    b'{"optionalFeatures": {"asynchronousSoftwareUpdate": NaN}}',
+    b'{"a": 1,}',
+    b"\xff\xfe",
+]
+
+
+def mutate(value: Any, rng: random.Random) -> Any:
+    """Randomly replaces leaves of a JSON document with edge cases of the same type, and drops or empties some
+    optional values."""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if rng.random() < 0.1:
+                continue
+            result[key] = mutate(item, rng)
+        return result
+    if isinstance(value, list):
+        if rng.random() < 0.1:
+            return []
+        return [mutate(item, rng) for item in value]
+    if isinstance(value, bool):
+        return rng.random() < 0.5
+    if isinstance(value, int):
+        return rng.choice(EDGE_INTS)
+    if isinstance(value, str):
+        return rng.choice(EDGE_STRINGS) if rng.random() < 0.7 else value
+
+    return value
+
+
+def documents(paths: List[Path], variants: int, seed: int) -> Iterator[Tuple[str, bytes]]:
+    """Yields every configuration to check, as a name and its raw bytes."""
+    rng = random.Random(seed)
+    for path in paths:
+        raw = path.read_bytes()
+        yield str(path), raw
+
+        document = json.loads(raw)
+        for variant in range(variants):
+            mutated = mutate(document, rng)
+            yield f"{path} variant {variant}", json.dumps(mutated, ensure_ascii=rng.random() < 0.5).encode("utf-8")
+
+
+def check(name: str, raw: bytes) -> List[str]:
+    """Loads and dumps a configuration through both codecs.
+
+    Returns:
+        List[str]: A description of every mismatch found.
+    """
+    errors = []
+    try:
+        expected = loads_nudge_config(raw, codec="pydantic")
+    except ValidationError:
+        try:
+            loads_nudge_config(raw, codec="orjson")
+        except ValidationError:
+            return []
+        return [f"{name}: rejected by pydantic but accepted by orjson"]
+
+    try:
+        actual = loads_nudge_config(raw, codec="orjson")
+    except ValidationError as e:
+        return [f"{name}: accepted by pydantic but rejected by orjson: {e}"]
+
+    if actual != expected:
+        errors.append(f"{name}: loaded configurations differ")
+
+    pydantic_dump = dumps_nudge_config(expected, codec="pydantic")
+    orjson_dump = dumps_nudge_config(expected, codec="orjson")
+    if orjson_dump != pydantic_dump:
+        position = next(
+            (i for i, (a, b) in enumerate(zip(orjson_dump, pydantic_dump)) if a != b),
+            min(len(orjson_dump), len(pydantic_dump)),
+        )
+        errors.append(f"{name}: dumps differ from byte {position}: {pydantic_dump[position:position + 40]!r}")
+
+    if dumps_nudge_config(loads_nudge_config(pydantic_dump, codec="orjson"), codec="orjson") != pydantic_dump:
+        errors.append(f"{name}: round trip through orjson changed the configuration")
+
+    return errors
+
+
+def main_cli(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("configs", nargs="*", type=Path, default=[CONFIG_FIXTURE], help="Configurations to check")
+    parser.add_argument("--variants", type=int, default=200, help="Random variants generated per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generating variants")
+    args = parser.parse_args(argv)
+
+    if nudge_config_codec.orjson is None:
+        print("orjson is not installed, so only the pydantic codec is available")
+        return 1
+
+    checked = 0
+    errors = []
+    for name, raw in documents(args.configs, args.variants, args.seed):
+        errors += check(name, raw)
+        checked += 1
+    for index, raw in enumerate(MALFORMED_DOCUMENTS):
+        errors += check(f"malformed document {index}", raw)
+        checked += 1
+
+    for error in errors:
+        print(error)
+    print(f"{checked} configurations checked, {len(errors)} mismatches")
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,140 @@
+"""Round-trip check for the feed history deltas.
+
+Generates seeded random pairs of JSON documents and fails unless apply(old, diff(old, new)) rebuilds new exactly,
+with values of every type kept apart (1, 1.0 and True are different values in a SOFA feed). Deltas are passed
+through JSON first, as FeedHistoryStore stores them. Pairs are drawn both from random documents and from edits of
+the SOFA feed fixture, such as prepended releases, and a sequence of edited feeds is also recorded in a
+FeedHistoryStore and read back.
+
+Run from the repository root:
+
+    python -m checks.history_roundtrip --cases 20000
+"""
+
+import argparse
+import copy
+import json
+import random
+import sys
+import tempfile
+from typing import Any, List
+
+from benchmarks.bench import feed_fixture
+from feed_history import FeedHistoryStore, apply, diff, identical
+
+# Scalars that compare equal across types, which a delta must still tell apart
+EDGE_SCALARS = [0, 1, -1, 0.0, 1.0, -1.0, True, False, None, "", "1", "true", 2**53, 0.5]
+
+
+def random_value(rng: random.Random, depth: int = 0) -> Any:
+    """Generates a random JSON value, mostly small and full of scalars that are equal to each other across types."""
+    roll = rng.random()
+    if depth < 3 and roll < 0.2:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(6))]
+    if depth < 3 and roll < 0.35:
+        return {rng.choice("abcdef"): random_value(rng, depth + 1) for _ in range(rng.randrange(5))}
+
+    return rng.choice(EDGE_SCALARS)
+
+
+def mutate(value: Any, rng: random.Random) -> Any:
+    """Randomly edits a JSON value: replaces scalars, inserts, removes and reorders list items, and adds or removes
+    dict keys."""
+    if isinstance(value, dict):
+        result = {key: mutate(item, rng) if rng.random() < 0.5 else item for key, item in value.items()}
+        if result and rng.random() < 0.2:
+            del result[rng.choice(list(result))]
+        if rng.random() < 0.2:
+            result[rng.choice("abcdefgh")] = random_value(rng, 2)
+        return result
+
+    if isinstance(value, list):
+        result = [mutate(item, rng) if rng.random() < 0.3 else item for item in value]
+        for _ in range(rng.randrange(3)):
+            action = rng.random()
+            position = rng.randrange(len(result) + 1)
+            if action < 0.4:
+                result.insert(position, random_value(rng, 2))
+            elif action < 0.7 and result:
+                del result[min(position, len(result) - 1)]
+            elif len(result) > 1:
+                rng.shuffle(result)
+        return result
+
+    return rng.choice(EDGE_SCALARS) if rng.random() < 0.7 else value
+
+
+def edit_feed(feed: dict, rng: random.Random) -> dict:
+    """Edits a SOFA feed the way new revisions do: prepends a release, bumps XProtect, or edits the models catalog."""
+    feed = copy.deepcopy(feed)
+    os_version = rng.choice(feed["OSVersions"])
+    action = rng.random()
+    if action < 0.4 and os_version["SecurityReleases"]:
+        release = copy.deepcopy(os_version["SecurityReleases"][0])
+        release["ProductVersion"] += f".{rng.randrange(100)}"
+        os_version["SecurityReleases"].insert(0, release)
+    elif action < 0.6:
+        feed["XProtectPayloads"]["com.apple.XProtectFramework.XProtect"] = str(rng.randrange(10000))
+    else:
+        feed["Models"] = mutate(feed["Models"], rng)
+    feed["UpdateHash"] = f"{rng.getrandbits(128):032x}"
+    return feed
+
+
+def check_pair(name: str, old: Any, new: Any) -> List[str]:
+    """Diffs and re-applies a pair of documents, passing the delta through JSON.
+
+    Returns:
+        List[str]: A description of the mismatch, if any.
+    """
+    delta = json.loads(json.dumps(diff(old, new)))
+    rebuilt = apply(old, delta)
+    if not identical(rebuilt, new):
+        return [f"{name}: {json.dumps(old)[:80]} -> {json.dumps(new)[:80]} rebuilt as {json.dumps(rebuilt)[:80]}"]
+
+    return []
+
+
+def check_store(feeds: List[dict]) -> List[str]:
+    """Records a sequence of feeds in a FeedHistoryStore, rebasing every few revisions, and reads every one back."""
+    errors = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = FeedHistoryStore(directory, rebase_every=3)
+        for feed in feeds:
+            store.add(feed["UpdateHash"], json.dumps(feed).encode("utf-8"))
+        for feed in feeds:
+            if not identical(store.get_json(feed["UpdateHash"]), feed):
+                errors.append(f"history store: revision {feed['UpdateHash']} read back differently")
+
+    return errors
+
+
+def main_cli(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=5000, help="Random document pairs to check")
+    parser.add_argument("--feed-revisions", type=int, default=20, help="Edited SOFA feed revisions to check")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generating documents")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    errors = []
+    for case in range(args.cases):
+        old = random_value(rng)
+        errors += check_pair(f"case {case}", old, mutate(old, rng))
+
+    feeds = [json.loads(feed_fixture().read_bytes())]
+    for _ in range(args.feed_revisions):
+        feeds.append(edit_feed(feeds[-1], rng))
+    for index, (old, new) in enumerate(zip(feeds, feeds[1:])):
+        errors += check_pair(f"feed revision {index + 1}", old, new)
+    errors += check_store(feeds)
+
+    for error in errors:
+        print(error)
+    print(f"{args.cases} documents and {args.feed_revisions} feed revisions checked, {len(errors)} mismatches")
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
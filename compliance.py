@@ -0,0 +1,242 @@
+"""Evaluates a device inventory against a Nudge configuration and the current SOFA feed.
+
+Reads a CSV (or, with pyarrow installed, Parquet) inventory with one row per device, and reports for every device
+whether it already meets its required minimum OS version, how many days remain until the required installation date,
+and whether the device can install the required version at all. Devices whose OS version can't be parsed are counted
+separately, with an empty compliant column.
+
+    python compliance.py inventory.csv --config v1/nudge_config.json --output compliance.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import main
+from feed_snapshot_store import FeedSnapshotStore
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import MacSofaFeed
+    from models.nudge_config import NudgeConfig, OsVersionRequirement
+
+OUTPUT_COLUMNS = [
+    "serial",
+    "model_identifier",
+    "os_version",
+    "required_version",
+    "compliant",
+    "days_remaining",
+    "can_upgrade",
+]
+
+# Rapid Security Responses append a letter to the version they patch, for example '15.5 (a)'
+RSR_SUFFIX = re.compile(r"\s*\([a-z]\)$", re.IGNORECASE)
+
+
+class ComplianceColumns(NamedTuple):
+    required_version: List[Optional[str]]
+    compliant: List[Optional[bool]]  # None where the device's or the required version can't be parsed
+    days_remaining: List[Optional[int]]
+    can_upgrade: List[bool]
+
+
+def base_version(version: str) -> str:
+    """Strips a Rapid Security Response suffix, so '15.5 (a)' becomes '15.5'."""
+    return RSR_SUFFIX.sub("", version.strip())
+
+
+def version_key(version: Optional[str]) -> Optional[int]:
+    """Encodes a version such as '14.4.1' or '15.5 (a)' as a single integer that orders the same way the version
+    does. Rapid Security Responses order the same as the version they patch.
+
+    Returns:
+        Optional[int]: The encoded version, or None if the version can't be parsed.
+    """
+    try:
+        parts = [int(part) for part in base_version(version or "").split(".")]
+    except ValueError:
+        return None
+    if not parts or len(parts) > 3:
+        return None
+
+    parts += [0] * (3 - len(parts))
+    return parts[0] * 1_000_000 + parts[1] * 1_000 + parts[2]
+
+
+def factorize(values: Sequence[str]) -> Tuple[List[int], List[str]]:
+    """Dictionary-encodes a column, so per-value work only has to happen once per distinct value.
+
+    Returns:
+        Tuple[List[int], List[str]]: A code for each row, and the distinct values the codes refer to.
+    """
+    uniques: Dict[str, int] = {}
+    codes = [uniques.setdefault(value, len(uniques)) for value in values]
+    return codes, list(uniques)
+
+
+def read_inventory(path: str, columns: Sequence[str]) -> Dict[str, List[str]]:
+    """Reads the requested columns of a CSV or Parquet inventory.
+
+    Args:
+        path (str): Path of the inventory file.
+        columns (Sequence[str]): Names of the columns to read.
+
+    Returns:
+        Dict[str, List[str]]: The values of each column, keyed by column name.
+    """
+    if Path(path).suffix.lower() == ".parquet":
+        try:
+            import pyarrow.parquet as parquet
+        except ImportError:
+            raise RuntimeError("Reading Parquet inventories requires pyarrow to be installed")
+
+        table = parquet.read_table(path, columns=list(columns)).to_pydict()
+        return {column: ["" if value is None else str(value) for value in table[column]] for column in columns}
+
+    result: Dict[str, List[str]] = {column: [] for column in columns}
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        missing = [column for column in columns if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Inventory {path} is missing columns: {', '.join(missing)}")
+        for row in reader:
+            for column in columns:
+                result[column].append(row[column])
+
+    return result
+
+
+def select_requirement(config: NudgeConfig, os_version: str) -> Optional[OsVersionRequirement]:
+    """Finds the OS version requirement Nudge applies to a device, the same way targetedOSVersionsRule does: an exact
+    version match first, then a major version match, then the default requirement."""
+    os_version = base_version(os_version)
+    major = os_version.split(".")[0]
+    by_rule = {requirement.targeted_os_versions_rule: requirement for requirement in config.os_version_requirements}
+
+    return by_rule.get(os_version) or by_rule.get(major) or by_rule.get("default") or by_rule.get(None)
+
+
+def evaluate(
+    feed: MacSofaFeed,
+    config: NudgeConfig,
+    model_identifiers: Sequence[str],
+    os_versions: Sequence[str],
+    today: Optional[date] = None,
+) -> ComplianceColumns:
+    """Evaluates a device inventory in bulk. Work is done once per distinct OS version and once per distinct model
+    and required version pair, then broadcast back to every row, so cost grows with the variety of the fleet rather
+    than with its size.
+
+    Args:
+        feed (MacSofaFeed): SOFA Feed used to check whether devices can install their required version.
+        config (NudgeConfig): The Nudge configuration devices are evaluated against.
+        model_identifiers (Sequence[str]): Model identifier or board ID of each device.
+        os_versions (Sequence[str]): Current OS version of each device.
+        today (Optional[date]): Date to count remaining days from. Defaults to today.
+
+    Returns:
+        ComplianceColumns: The evaluation results, one entry per device.
+    """
+    today = today or date.today()
+    compatibility = feed.compatibility
+
+    # Per distinct OS version: the applicable requirement, and whether that version already satisfies it
+    version_codes, distinct_versions = factorize(os_versions)
+    required_by_code: List[Optional[str]] = []
+    compliant_by_code: List[Optional[bool]] = []
+    days_by_code: List[Optional[int]] = []
+    for os_version in distinct_versions:
+        requirement = select_requirement(config, os_version)
+        required = requirement.required_minimum_os_version if requirement else None
+        current_key, required_key = version_key(os_version), version_key(required)
+
+        required_by_code.append(required)
+        if required is None:
+            compliant_by_code.append(True)
+        elif current_key is None or required_key is None:
+            compliant_by_code.append(None)
+        else:
+            compliant_by_code.append(current_key >= required_key)
+        days_by_code.append(
+            (datetime.strptime(requirement.required_installation_date[:10], "%Y-%m-%d").date() - today).days
+            if requirement and requirement.required_installation_date
+            else None
+        )
+
+    required_versions = [required_by_code[code] for code in version_codes]
+
+    # Per distinct required version: bulk compatibility check over every device targeting it
+    can_upgrade = [True] * len(required_versions)
+    rows_by_required: Dict[str, List[int]] = {}
+    for row, required in enumerate(required_versions):
+        if required is not None:
+            rows_by_required.setdefault(required, []).append(row)
+    for required, rows in rows_by_required.items():
+        supported = compatibility.supports_many([model_identifiers[row] for row in rows], required)
+        for row, value in zip(rows, supported):
+            can_upgrade[row] = value
+
+    return ComplianceColumns(
+        required_version=required_versions,
+        compliant=[compliant_by_code[code] for code in version_codes],
+        days_remaining=[days_by_code[code] for code in version_codes],
+        can_upgrade=can_upgrade,
+    )
+
+
+def main_cli(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inventory", help="CSV or Parquet inventory, one row per device")
+    parser.add_argument("--config", default=main.NUDGE_CONFIG_PATH, help="Nudge configuration to evaluate against")
+    parser.add_argument("--feed-url", default=main.MACOS_SOFA_FEED_URL, help="SOFA feed to evaluate against")
+    parser.add_argument("--snapshot", help="Use the locally stored SOFA feed with this UpdateHash instead")
+    parser.add_argument("--output", help="Write per-device results as CSV to this path")
+    parser.add_argument("--serial-column", default="serial")
+    parser.add_argument("--model-column", default="model_identifier")
+    parser.add_argument("--os-version-column", default="os_version")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        feed = FeedSnapshotStore(main.SNAPSHOT_DIR, main.SNAPSHOT_LIMIT).load(args.snapshot)
+        if feed is None:
+            print(f"No local snapshot stored for {args.snapshot} in {main.SNAPSHOT_DIR}")
+            return 1
+    else:
+        feed = main.get_feed(args.feed_url)
+    config = main.get_nudge_config(args.config)
+
+    columns = read_inventory(args.inventory, [args.serial_column, args.model_column, args.os_version_column])
+    serials, models, os_versions = (
+        columns[name] for name in (args.serial_column, args.model_column, args.os_version_column)
+    )
+    results = evaluate(feed, config, models, os_versions)
+
+    total = len(serials)
+    compliant = sum(value is True for value in results.compliant)
+    unknown = sum(value is None for value in results.compliant)
+    blocked = sum(
+        compliant is False and not can_upgrade for compliant, can_upgrade in zip(results.compliant, results.can_upgrade)
+    )
+    print(f"Devices: {total}")
+    print(f"Compliant: {compliant}")
+    print(f"Non-compliant: {total - compliant - unknown}, of which unable to upgrade: {blocked}")
+    print(f"Unparseable OS version: {unknown}")
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(OUTPUT_COLUMNS)
+            writer.writerows(zip(serials, models, os_versions, *results))
+        print(f"Results written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from enum import Enum
+from typing import TYPE_CHECKING, Iterable, List, NamedTuple, Optional, Set
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import SofaFeed
+
+
+class ChangeKind(str, Enum):
+    NEW_LATEST = "new_latest"
+    NEW_MAJOR = "new_major"
+    REMOVED_MAJOR = "removed_major"
+    NEWLY_EXPLOITED = "newly_exploited"
+    SECURITY_RELEASES = "security_releases"
+    SUPPORTED_MODELS = "supported_models"
+    XPROTECT = "xprotect"
+    MODELS = "models"
+    INSTALLERS = "installers"
+
+
+class FeedChange(NamedTuple):
+    kind: ChangeKind
+    major: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class FeedChangeSet(NamedTuple):
+    """Changes between two SOFA feed releases, summarized in the commit message of an auto-nudge update."""
+
+    previous_hash: Optional[str]
+    current_hash: str
+    changes: List[FeedChange]
+
+    def summary(self) -> str:
+        """Describes the change set in one line, for example 'new latest 15.6; XProtect 5300 to 5301'."""
+        if not self.changes:
+            return "no changes"
+
+        return "; ".join(change.detail or change.kind.value for change in self.changes)
+
+
+def _exploited_cves(releases: Iterable) -> Set[str]:
+    return {cve for release in releases for cve in release.actively_exploited_cves}
+
+
+def diff_feeds(previous: SofaFeed, current: SofaFeed) -> FeedChangeSet:
+    """Compares two SOFA feeds section by section. Sections that compare equal are skipped without looking inside
+    them, so an unrelated edit only costs a walk of the section it touches.
+
+    Args:
+        previous (SofaFeed): The feed the configs were last updated against.
+        current (SofaFeed): The newly downloaded feed.
+
+    Returns:
+        FeedChangeSet: Every change found, in feed order.
+    """
+    changes: List[FeedChange] = []
+    if previous.update_hash == current.update_hash:
+        return FeedChangeSet(previous.update_hash, current.update_hash, changes)
+
+    if previous.os_versions != current.os_versions:
+        previous_by_major = previous.os_versions_by_major
+        current_by_major = current.os_versions_by_major
+
+        for major, os_version in current_by_major.items():
+            old = previous_by_major.get(major)
+            if old is None:
+                changes.append(FeedChange(ChangeKind.NEW_MAJOR, major, f"new major {os_version.os_version}"))
+                continue
+            if old == os_version:
+                continue
+
+            if old.latest.product_version != os_version.latest.product_version:
+                changes.append(
+                    FeedChange(ChangeKind.NEW_LATEST, major, f"new latest {os_version.latest.product_version}")
+                )
+
+            if old.security_releases != os_version.security_releases:
+                newly_exploited = _exploited_cves(os_version.security_releases) - _exploited_cves(old.security_releases)
+                if newly_exploited:
+                    changes.append(
+                        FeedChange(
+                            ChangeKind.NEWLY_EXPLOITED,
+                            major,
+                            f"{len(newly_exploited)} newly actively exploited CVEs in macOS {major}",
+                        )
+                    )
+                else:
+                    changes.append(
+                        FeedChange(ChangeKind.SECURITY_RELEASES, major, f"macOS {major} security releases edited")
+                    )
+
+            if getattr(old, "supported_models", None) != getattr(os_version, "supported_models", None):
+                changes.append(FeedChange(ChangeKind.SUPPORTED_MODELS, major, f"macOS {major} supported models edited"))
+
+        for major in previous_by_major.keys() - current_by_major.keys():
+            changes.append(FeedChange(ChangeKind.REMOVED_MAJOR, major, f"removed macOS {major}"))
+
+    # Slim feeds don't carry the remaining sections, so they never report changes to them
+    old_xprotect = getattr(previous, "x_protect_plist_config_data", None)
+    new_xprotect = getattr(current, "x_protect_plist_config_data", None)
+    if old_xprotect != new_xprotect or getattr(previous, "x_protect_payloads", None) != getattr(
+        current, "x_protect_payloads", None
+    ):
+        detail = "XProtect updated"
+        if old_xprotect is not None and new_xprotect is not None and old_xprotect != new_xprotect:
+            detail = f"XProtect {old_xprotect.com_apple_x_protect} to {new_xprotect.com_apple_x_protect}"
+        changes.append(FeedChange(ChangeKind.XPROTECT, detail=detail))
+
+    if getattr(previous, "models", None) != getattr(current, "models", None):
+        changes.append(FeedChange(ChangeKind.MODELS, detail="models catalog edited"))
+
+    if getattr(previous, "installation_apps", None) != getattr(current, "installation_apps", None):
+        changes.append(FeedChange(ChangeKind.INSTALLERS, detail="installers updated"))
+
+    return FeedChangeSet(previous.update_hash, current.update_hash, changes)
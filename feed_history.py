@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+
+from file_utils import COMPRESSED_SUFFIX, compress, decompress, rename_legacy_compressed, write_atomic
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import SofaFeed
+
+JsonValue = Any
+Delta = Dict[str, Any]
+
+
+def identical(old: JsonValue, new: JsonValue) -> bool:
+    """Compares two JSON documents like ==, but also tells apart values that Python treats as equal across types, such
+    as 1, 1.0 and True, at any depth."""
+    if old is new:
+        return True
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(identical(value, new[key]) for key, value in old.items())
+    if isinstance(old, list):
+        return len(old) == len(new) and all(map(identical, old, new))
+
+    return old == new
+
+
+def diff(old: JsonValue, new: JsonValue) -> Optional[Delta]:
+    """Computes a structural delta between two JSON documents.
+
+    Dicts are diffed key by key. Lists are trimmed to their common prefix and suffix, so a release prepended to a list
+    only stores that release. Equal-length middles are diffed element by element, and anything else is replaced.
+
+    Args:
+        old (JsonValue): The previous document.
+        new (JsonValue): The current document.
+
+    Returns:
+        Optional[Delta]: The delta turning old into new, or None if they are equal.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes: Delta = {}
+        removed = [key for key in old if key not in new]
+        added = {key: value for key, value in new.items() if key not in old}
+        nested = {}
+        for key, value in new.items():
+            if key in old:
+                delta = diff(old[key], value)
+                if delta is not None:
+                    nested[key] = delta
+        if removed:
+            changes["del"] = removed
+        if added:
+            changes["set"] = added
+        if nested:
+            changes["sub"] = nested
+        return {"dict": changes} if changes else None
+
+    if isinstance(old, list) and isinstance(new, list):
+        if identical(old, new):
+            return None
+
+        prefix = 0
+        while prefix < min(len(old), len(new)) and identical(old[prefix], new[prefix]):
+            prefix += 1
+        suffix = 0
+        while suffix < min(len(old), len(new)) - prefix and identical(old[-1 - suffix], new[-1 - suffix]):
+            suffix += 1
+
+        old_middle = old[prefix : len(old) - suffix]
+        new_middle = new[prefix : len(new) - suffix]
+        if len(old_middle) == len(new_middle):
+            items = {}
+            for offset, (old_item, new_item) in enumerate(zip(old_middle, new_middle)):
+                delta = diff(old_item, new_item)
+                if delta is not None:
+                    items[str(prefix + offset)] = delta
+            return {"items": items}
+
+        return {"splice": {"start": prefix, "delete": len(old_middle), "insert": new_middle}}
+
+    if identical(old, new):
+        return None
+
+    return {"replace": new}
+
+
+def apply(old: JsonValue, delta: Optional[Delta]) -> JsonValue:
+    """Applies a delta produced by diff(), returning the new document. The old document is not modified.
+
+    Args:
+        old (JsonValue): The document the delta was computed against.
+        delta (Optional[Delta]): The delta to apply.
+
+    Returns:
+        JsonValue: The resulting document.
+    """
+    if delta is None:
+        return old
+    if "replace" in delta:
+        return delta["replace"]
+
+    if "dict" in delta:
+        changes = delta["dict"]
+        new = {key: value for key, value in old.items() if key not in changes.get("del", ())}
+        for key, nested in changes.get("sub", {}).items():
+            new[key] = apply(old[key], nested)
+        new.update(changes.get("set", {}))
+        return new
+
+    if "items" in delta:
+        new = list(old)
+        for index, nested in delta["items"].items():
+            new[int(index)] = apply(old[int(index)], nested)
+        return new
+
+    splice = delta["splice"]
+    return old[: splice["start"]] + splice["insert"] + old[splice["start"] + splice["delete"] :]
+
+
+class FeedHistoryStore:
+    """Keeps every SOFA feed revision seen, keyed by UpdateHash, as a full base snapshot followed by structural deltas.
+
+    Most of the feed doesn't change between revisions, so each revision after a base only stores what changed. A new
+    base is written every rebase_every revisions, which bounds how many deltas are applied to rebuild any revision.
+    """
+
+    INDEX_FILE = "history.json"
+
+    def __init__(self, root: str, rebase_every: int = 20):
+        self.root = Path(root)
+        self.rebase_every = rebase_every
+        rename_legacy_compressed(self.root, r"[A-Za-z0-9]+\.(base|delta)\.json")
+
+    def _read_index(self) -> List[Dict[str, str]]:
+        path = self.root / self.INDEX_FILE
+        if not path.is_file():
+            return []
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write_index(self, entries: List[Dict[str, str]]) -> None:
+        write_atomic(self.root / self.INDEX_FILE, json.dumps(entries, indent=2).encode("utf-8"))
+
+    def _path(self, update_hash: str, kind: str) -> Path:
+        if not update_hash.isalnum():
+            raise ValueError(f"Invalid SOFA feed hash {update_hash!r}")
+        return self.root / f"{update_hash}.{kind}.json{COMPRESSED_SUFFIX}"
+
+    def _read(self, update_hash: str, kind: str) -> JsonValue:
+        return json.loads(decompress(self._path(update_hash, kind).read_bytes()))
+
+    def _write(self, update_hash: str, kind: str, value: JsonValue) -> None:
+        data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        write_atomic(self._path(update_hash, kind), compress(data))
+
+    def hashes(self) -> List[str]:
+        """Lists every recorded revision's UpdateHash, oldest first."""
+        return [entry["hash"] for entry in self._read_index()]
+
+    def entries(self) -> List[Dict[str, str]]:
+        """Lists every recorded revision's index entry (hash, kind, parent and recorded_at), oldest first."""
+        return self._read_index()
+
+    def add(self, update_hash: str, raw: bytes) -> bool:
+        """Records a feed revision, as a delta against the latest revision or as a new base.
+
+        Args:
+            update_hash (str): UpdateHash of the feed.
+            raw (bytes): The feed exactly as downloaded.
+
+        Returns:
+            bool: True if the revision was recorded, False if it was already present.
+        """
+        entries = self._read_index()
+        if any(entry["hash"] == update_hash for entry in entries):
+            return False
+
+        document = json.loads(raw)
+        chain_length = 0
+        for entry in reversed(entries):
+            if entry["kind"] == "base":
+                break
+            chain_length += 1
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        parent = entries[-1]["hash"] if entries else None
+        if parent is None or chain_length + 1 >= self.rebase_every:
+            kind = "base"
+            self._write(update_hash, kind, document)
+        else:
+            kind = "delta"
+            self._write(update_hash, kind, diff(self.get_json(parent), document))
+
+        entries.append(
+            {
+                "hash": update_hash,
+                "kind": kind,
+                "parent": parent,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        self._write_index(entries)
+        return True
+
+    def has(self, update_hash: str) -> bool:
+        return bool(update_hash) and update_hash in self.hashes()
+
+    def get_json(self, update_hash: str) -> Optional[JsonValue]:
+        """Rebuilds a recorded revision as its raw JSON document, from its nearest base and the deltas after it.
+
+        Args:
+            update_hash (str): UpdateHash of the revision.
+
+        Returns:
+            Optional[JsonValue]: The feed document, or None if no revision is recorded for the hash.
+        """
+        entries = self._read_index()
+        position = next((i for i, entry in enumerate(entries) if entry["hash"] == update_hash), None)
+        if position is None:
+            return None
+
+        base = position
+        while entries[base]["kind"] != "base":
+            base -= 1
+
+        document = self._read(entries[base]["hash"], "base")
+        for entry in entries[base + 1 : position + 1]:
+            document = apply(document, self._read(entry["hash"], "delta"))
+
+        return document
+
+    def load(self, update_hash: str, model: Optional[Type[SofaFeed]] = None) -> Optional[SofaFeed]:
+        """Rebuilds a recorded revision and validates it into a feed model.
+
+        Args:
+            update_hash (str): UpdateHash of the revision.
+            model (Optional[Type[SofaFeed]]): Model to load the feed as. Defaults to MacSofaFeed.
+
+        Returns:
+            Optional[SofaFeed]: The validated feed, or None if no revision is recorded for the hash.
+        """
+        document = self.get_json(update_hash)
+        if document is None:
+            return None
+
+        if model is None:
+            from models.macos_sofa_feed import MacSofaFeed
+
+            model = MacSofaFeed
+
+        return model.model_validate(document)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple, Type
+
+from file_utils import COMPRESSED_SUFFIX, compress, decompress, rename_legacy_compressed, write_atomic
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import SofaFeed
+
+MAX_LOADED_FEEDS = 4
+
+_loaded_feeds: "OrderedDict[Tuple[Path, str, str], SofaFeed]" = OrderedDict()
+
+
+@lru_cache(maxsize=None)
+def schema_fingerprint(model: Type[SofaFeed]) -> str:
+    """Fingerprints the source of the module defining a model together with the pydantic version, so pickles written
+    by another version of either are never loaded. Hashing the source is far cheaper than building the JSON schema,
+    which would cost more than the pickle saves on a cold start."""
+    import pydantic
+
+    source = Path(sys.modules[model.__module__].__file__).read_bytes()
+    return hashlib.sha256(pydantic.VERSION.encode("utf-8") + b":" + source).hexdigest()[:16]
+
+
+class FeedSnapshotStore:
+    """Content-addressed on-disk store of SOFA feed snapshots, keyed by UpdateHash.
+
+    Each snapshot keeps the raw feed bytes, plus a pickled copy of every model the feed has been validated into so far,
+    which loads far faster than validating the raw bytes again. Pickles are keyed by the model's schema fingerprint,
+    and are rebuilt from the raw bytes if they can't be loaded. Both are compressed with the fastest codec available
+    (see file_utils.compress). Only the most recently used snapshots are kept. Pickles are only ever read from a
+    directory this tool writes itself.
+
+    Loaded feeds are also kept in memory, keyed by UpdateHash and model, so repeated loads within a process, such as
+    forced polls in watch mode, return the already loaded feed. Loaded feeds are shared and must not be modified.
+    """
+
+    RAW_SUFFIX = f".json{COMPRESSED_SUFFIX}"
+
+    def __init__(self, root: str, max_snapshots: int = 10):
+        self.root = Path(root)
+        self.max_snapshots = max_snapshots
+        rename_legacy_compressed(self.root, r"[A-Za-z0-9]+\.json")
+
+    def _raw_path(self, update_hash: str) -> Path:
+        if not update_hash.isalnum():
+            raise ValueError(f"Invalid SOFA feed hash {update_hash!r}")
+        return self.root / f"{update_hash}{self.RAW_SUFFIX}"
+
+    def _model_path(self, update_hash: str, model: Type[SofaFeed]) -> Path:
+        return self.root / f"{update_hash}.{model.__name__}.{schema_fingerprint(model)}.pickle"
+
+    def hashes(self) -> List[str]:
+        """Lists the hashes of every stored snapshot, most recently used first.
+
+        Returns:
+            List[str]: Stored UpdateHash values.
+        """
+        if not self.root.is_dir():
+            return []
+
+        paths = sorted(self.root.glob(f"*{self.RAW_SUFFIX}"), key=lambda path: path.stat().st_mtime, reverse=True)
+        return [path.name[: -len(self.RAW_SUFFIX)] for path in paths]
+
+    def has(self, update_hash: str) -> bool:
+        return bool(update_hash) and self._raw_path(update_hash).is_file()
+
+    def put(self, update_hash: str, raw: bytes, feed: Optional[SofaFeed] = None) -> None:
+        """Stores the raw bytes of a feed, then evicts the least recently used snapshots over the limit.
+
+        Args:
+            update_hash (str): UpdateHash of the feed.
+            raw (bytes): The feed exactly as downloaded.
+            feed (Optional[SofaFeed]): The feed already validated from raw, pickled alongside it so later loads don't
+                validate it again.
+        """
+        path = self._raw_path(update_hash)
+        if path.is_file():
+            path.touch()
+        else:
+            self.root.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, compress(raw))
+            self.evict()
+
+        if feed is not None:
+            self._write_model(update_hash, feed)
+            self._remember(update_hash, feed)
+
+    def _write_model(self, update_hash: str, feed: SofaFeed) -> None:
+        model = type(feed)
+        # Drop pickles written for earlier versions of the model
+        for stale_path in self.root.glob(f"{update_hash}.{model.__name__}.*.pickle"):
+            os.remove(stale_path)
+        write_atomic(
+            self._model_path(update_hash, model), compress(pickle.dumps(feed, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+
+    def _remember(self, update_hash: str, feed: SofaFeed) -> None:
+        _loaded_feeds[(self.root.resolve(), update_hash, type(feed).__name__)] = feed
+        while len(_loaded_feeds) > MAX_LOADED_FEEDS:
+            _loaded_feeds.popitem(last=False)
+
+    def get_raw(self, update_hash: str) -> Optional[bytes]:
+        """Reads the raw bytes of a stored feed.
+
+        Args:
+            update_hash (str): UpdateHash of the feed.
+
+        Returns:
+            Optional[bytes]: The feed bytes, or None if no snapshot is stored for the hash.
+        """
+        if not self.has(update_hash):
+            return None
+
+        return decompress(self._raw_path(update_hash).read_bytes())
+
+    def load(self, update_hash: str, model: Optional[Type[SofaFeed]] = None) -> Optional[SofaFeed]:
+        """Loads a stored feed as the given model, from its pickled form if present. Otherwise the raw bytes are
+        validated and the result is pickled for next time.
+
+        Args:
+            update_hash (str): UpdateHash of the feed.
+            model (Optional[Type[SofaFeed]]): Model to load the feed as. Defaults to MacSofaFeed.
+
+        Returns:
+            Optional[SofaFeed]: The validated feed, or None if no snapshot is stored for the hash.
+        """
+        if not self.has(update_hash):
+            return None
+
+        if model is None:
+            from models.macos_sofa_feed import MacSofaFeed
+
+            model = MacSofaFeed
+
+        self._raw_path(update_hash).touch()
+        key = (self.root.resolve(), update_hash, model.__name__)
+        feed = _loaded_feeds.get(key)
+        if feed is not None:
+            _loaded_feeds.move_to_end(key)
+            return feed
+
+        model_path = self._model_path(update_hash, model)
+        feed = None
+        if model_path.is_file():
+            try:
+                feed = pickle.loads(decompress(model_path.read_bytes()))
+            except Exception as e:
+                print(f"Discarding unreadable snapshot {model_path.name}: {e!r}")
+            if not isinstance(feed, model):
+                feed = None
+
+        if feed is None:
+            feed = model.model_validate_json(self.get_raw(update_hash))
+            self._write_model(update_hash, feed)
+
+        self._remember(update_hash, feed)
+        return feed
+
+    def evict(self) -> None:
+        """Removes the least recently used snapshots beyond max_snapshots."""
+        for update_hash in self.hashes()[self.max_snapshots :]:
+            for path in self.root.glob(f"{update_hash}.*"):
+                os.remove(path)
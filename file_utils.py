@@ -0,0 +1,167 @@
+import gzip
+import os
+import re
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+NEW_FILE_MODE = 0o644
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 1
+# Suffix of files written through compress(). Files from before the codec was chosen at runtime used ".gz".
+COMPRESSED_SUFFIX = ".compressed"
+LEGACY_COMPRESSED_SUFFIX = ".gz"
+LOCK_SUFFIX = ".lock"
+
+
+def write_atomic(path: Union[str, Path], data: bytes) -> None:
+    """Writes a file atomically by writing to a temporary file in the same directory, syncing it to disk, then
+    renaming it over the destination. Readers only ever see the old or the new contents, never a partial write.
+
+    Args:
+        path (Union[str, Path]): The file to write.
+        data (bytes): The complete new contents of the file.
+    """
+    path = Path(path)
+    directory = path.parent if str(path.parent) else Path(".")
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{path.name}.", suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+        mode = stat.S_IMODE(os.stat(path).st_mode) if path.exists() else NEW_FILE_MODE
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Persist the rename itself. Not every platform supports syncing a directory.
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def write_if_changed(path: Union[str, Path], data: bytes) -> bool:
+    """Atomically writes a file, but only if its contents differ from what is already on disk.
+
+    Args:
+        path (Union[str, Path]): The file to write.
+        data (bytes): The complete new contents of the file.
+
+    Returns:
+        bool: True if the file was written, False if it already held the same contents.
+    """
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    write_atomic(path, data)
+    return True
+
+
+@contextmanager
+def file_lock(path: Union[str, Path], shared: bool = False) -> Iterator[None]:
+    """Holds an advisory lock on a file for the duration of the block. The lock is taken on a separate file next to
+    it, as write_atomic replaces the file itself. Only processes taking the same lock are excluded, and no lock is
+    taken on platforms without fcntl.
+
+    Args:
+        path (Union[str, Path]): The file to lock.
+        shared (bool): Take a shared lock for reading, rather than an exclusive one for writing.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    path = Path(path)
+    with open(path.with_name(path.name + LOCK_SUFFIX), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def compress(data: bytes) -> bytes:
+    """Compresses data for storage with the fastest codec available: zstd if the zstandard package is installed,
+    otherwise gzip at its fastest level.
+
+    Args:
+        data (bytes): The data to compress.
+
+    Returns:
+        bytes: The compressed data.
+    """
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def rename_legacy_compressed(directory: Union[str, Path], name_pattern: str) -> None:
+    """Renames files a store wrote with the legacy ".gz" suffix to COMPRESSED_SUFFIX. Their contents are gzip, which
+    decompress() still reads. Only names matching name_pattern are touched, so other files in the directory keep
+    their names.
+
+    Args:
+        directory (Union[str, Path]): The store's directory. Nothing happens if it doesn't exist.
+        name_pattern (str): Regular expression the whole file name must match, without the ".gz" suffix.
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        return
+
+    pattern = re.compile(name_pattern)
+    for path in directory.glob(f"*{LEGACY_COMPRESSED_SUFFIX}"):
+        if pattern.fullmatch(path.name[: -len(LEGACY_COMPRESSED_SUFFIX)]):
+            os.replace(path, path.with_suffix(COMPRESSED_SUFFIX))
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompresses data written by compress(), detecting the codec from its leading magic bytes. Data that isn't
+    compressed, such as files written before compression was introduced, is returned as is.
+
+    Args:
+        data (bytes): The compressed data.
+
+    Returns:
+        bytes: The original data.
+    """
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("Reading zstd compressed data requires zstandard to be installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+
+    return data
@@ -1,19 +1,41 @@
+from __future__ import annotations
+
+import glob
 import os
+import re
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import backoff
 import requests
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
-from models.auto_nudge_cache import AutoNudgeCache
-from models.nudge_config import NudgeConfig
-from models.macos_sofa_feed import MacSofaFeed
-from num2words import num2words
+from feed_diff import FeedChangeSet, diff_feeds
+from feed_history import FeedHistoryStore
+from feed_snapshot_store import FeedSnapshotStore
+from file_utils import file_lock, write_atomic, write_if_changed
+from note_renderer import render_notes
+from nudge_config_codec import dumps_nudge_config, loads_nudge_config
+from profile_writers import dumps_mobileconfig, dumps_plist
+from models.auto_nudge_cache import AutoNudgeCache, ConfigCacheEntry, FeedCacheEntry
+from models.sofa_feed_header import SofaFeedHeader
 from pydantic import ValidationError
 from requests.exceptions import Timeout, ConnectionError
-from typing import Optional, Tuple
+from requests.adapters import HTTPAdapter
+from run_report import RunReport, stage, start_report
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple, Type
+
+# The feed and config schemas, and num2words, are only imported once a run reaches the update path. Most runs end
+# after the hash check, so keeping them out of startup saves most of the interpreter's cold start.
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import OsVersion, SofaFeed
+    from models.nudge_config import NudgeConfig, OsVersionRequirement
 
 load_dotenv()
 
@@ -21,28 +43,178 @@ MACOS_SOFA_FEED_URL = os.getenv("MACOS_SOFA_FEED_URL", "https://sofafeed.macadmi
 NUDGE_CONFIG_PATH = os.getenv("NUDGE_CONFIG_PATH", "./v1/nudge_config.json")
 FORCE_UPDATE = True if os.getenv("NUDGE_FORCE_UPDATE", "false").lower() == "true" else False
 CACHE_PATH = os.getenv("AUTO_NUDGE_CACHE_PATH", ".auto_nudge_cache.json")
+SLIM_FEED = True if os.getenv("AUTO_NUDGE_SLIM_FEED", "false").lower() == "true" else False
+FLEET_WORKERS = int(os.getenv("AUTO_NUDGE_FLEET_WORKERS") or 0) or None
+REQUEST_TIMEOUT = float(os.getenv("AUTO_NUDGE_REQUEST_TIMEOUT") or 30)
+SNAPSHOT_DIR = os.getenv("AUTO_NUDGE_SNAPSHOT_DIR") or ".auto_nudge_snapshots"
+SNAPSHOT_LIMIT = int(os.getenv("AUTO_NUDGE_SNAPSHOT_LIMIT") or 10)
+OFFLINE_FEED_HASH = os.getenv("AUTO_NUDGE_OFFLINE_FEED_HASH")
+HISTORY_DIR = os.getenv("AUTO_NUDGE_HISTORY_DIR") or ".auto_nudge_history"
+HISTORY_REBASE_INTERVAL = int(os.getenv("AUTO_NUDGE_HISTORY_REBASE_INTERVAL") or 20)
+REPORT_PATH = os.getenv("AUTO_NUDGE_REPORT_PATH") or ".auto_nudge_report.json"
+WATCH = "--watch" in sys.argv or os.getenv("AUTO_NUDGE_WATCH", "false").lower() == "true"
+WATCH_MIN_INTERVAL = float(os.getenv("AUTO_NUDGE_WATCH_MIN_INTERVAL") or 300)
+WATCH_MAX_INTERVAL = float(os.getenv("AUTO_NUDGE_WATCH_MAX_INTERVAL") or 3600)
+PROFILE_FORMATS = [name.strip() for name in (os.getenv("AUTO_NUDGE_PROFILE_FORMATS") or "").split(",") if name.strip()]
+PROFILE_FORMAT_NAMES = ("plist", "mobileconfig")
+PLIST_BINARY = True if os.getenv("AUTO_NUDGE_PLIST_BINARY", "false").lower() == "true" else False
+PROFILE_IDENTIFIER = os.getenv("AUTO_NUDGE_PROFILE_IDENTIFIER") or "com.github.macadmins.Nudge.auto-nudge"
+DEADLINE_OFFSET = timedelta(days=int(os.getenv("AUTO_NUDGE_DEADLINE_DAYS") or 14))
+EXPLOITED_DEADLINE_OFFSET = timedelta(days=int(os.getenv("AUTO_NUDGE_EXPLOITED_DEADLINE_DAYS") or 7))
+HTTP_POOL_SIZE = 10
+UNSAFE_COMMIT_CHARACTERS = re.compile(r"[^\w .,;:()+\-]")
+
+_session: Optional[requests.Session] = None
+_config_cache: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+
+
+class ConfigResult(NamedTuple):
+    path: str
+    status: str  # One of "updated", "unchanged", "current", "blackout" or "error"
+    detail: Optional[str] = None
+    target_version: Optional[str] = None
+
+
+def get_session() -> requests.Session:
+    """Returns the shared HTTP session, creating it on first use. Connections are pooled and kept alive between
+    requests, so repeated and concurrent feed fetches don't pay for a new TCP/TLS handshake each time. requests
+    already offers every content encoding urllib3 can decode: gzip and deflate always, plus brotli and zstd when the
+    brotli and zstandard packages are installed.
+
+    Returns:
+        requests.Session: The shared HTTP session.
+    """
+    global _session
+
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+
+    return _session
+
+
+def get_feed_model(slim: bool = False) -> Type[SofaFeed]:
+    """Imports and returns the model SOFA feeds are validated into.
+
+    Args:
+        slim (bool): Return SlimMacSofaFeed rather than the full MacSofaFeed.
+
+    Returns:
+        Type[SofaFeed]: The feed model.
+    """
+    from models.macos_sofa_feed import MacSofaFeed, SlimMacSofaFeed
+
+    return SlimMacSofaFeed if slim else MacSofaFeed
 
 
 @backoff.on_exception(backoff.expo, (Timeout, ConnectionError), max_tries=3)
-def get_feed(feed_url: str) -> MacSofaFeed:
+def get_feed(
+    feed_url: str,
+    cache: Optional[FeedCacheEntry] = None,
+    force: bool = False,
+    slim: bool = False,
+    store: Optional[FeedSnapshotStore] = None,
+) -> Optional[SofaFeed]:
     """Retrieves and validates the SOFA feed from the provided url.
 
+    If a cache is provided, the ETag and Last-Modified values it holds are sent as a conditional request, and the
+    values returned by the server are recorded back onto it. The feed's UpdateHash is then read on its own, and the
+    full validation only runs if it differs from the cached hash.
+
+    If a snapshot store is provided, downloaded feeds are saved to it after validation, and a forced run
+    whose feed hasn't been modified loads the cached release from it instead of downloading it again.
+
     Args:
         feed_url (str): The url from which to retrieve the SOFA feed.
+        cache (Optional[FeedCacheEntry]): Cache entry holding the validators of the last processed feed.
+        force (bool): Skip the conditional request and hash check, always downloading and validating the feed.
+        slim (bool): Validate into a SlimMacSofaFeed, keeping only the sections needed to update a Nudge config.
+        store (Optional[FeedSnapshotStore]): Local store of previously downloaded feeds.
 
     Returns:
-        MacSofaFeed: Validated SOFA Feed object
+        Optional[SofaFeed]: Validated SOFA Feed object, or None if the feed has not changed since the last run.
     """
     print(f"Retrieving SOFA feed from {feed_url}")
-    res = requests.get(feed_url)
+    snapshot_available = cache is not None and store is not None and store.has(cache.last_update_hash)
+
+    headers = {}
+    if cache is not None and (not force or snapshot_available):
+        if cache.etag:
+            headers["If-None-Match"] = cache.etag
+        if cache.last_modified:
+            headers["If-Modified-Since"] = cache.last_modified
+
+    with stage("feed_fetch") as span:
+        res = get_session().get(feed_url, headers=headers, timeout=REQUEST_TIMEOUT)
+        span.bytes = len(res.content)
+        span.cache_hit = res.status_code == 304
+        span.details["status"] = res.status_code
+        span.details["encoding"] = res.headers.get("Content-Encoding", "identity")
+
+    if res.status_code == 304:
+        print("SOFA feed not modified since last run")
+        if force and snapshot_available:
+            print(f"Loading SOFA feed release {cache.last_update_hash} from local snapshot")
+            with stage("feed_validate") as span:
+                span.details["source"] = "snapshot"
+                return store.load(cache.last_update_hash, get_feed_model(slim))
+        return None
     res.raise_for_status()
 
-    return MacSofaFeed.model_validate_json(res.text)
+    if cache is not None:
+        cache.etag = res.headers.get("ETag")
+        cache.last_modified = res.headers.get("Last-Modified")
+
+    with stage("feed_validate") as span:
+        # Validate the raw bytes directly, rather than decoding them into a str first
+        body = res.content
+        if cache is not None and not force:
+            update_hash = SofaFeedHeader.model_validate_json(body).update_hash
+            span.cache_hit = cache is not None and update_hash == cache.last_update_hash
+            if span.cache_hit and not force:
+                print("SOFA feed hash unchanged - skipping full validation")
+                return None
+
+        feed = get_feed_model(slim).model_validate_json(body)
+
+    if store is not None:
+        # The feed is already in memory, so failing to store it only costs the next run a download
+        try:
+            store.put(feed.update_hash, body, feed)
+        except Exception as e:
+            print(f"Unable to store SOFA feed release {feed.update_hash} in {store.root}: {e}")
+
+    return feed
+
+
+def get_feeds(feed_urls: List[str], slim: bool = False) -> Dict[str, SofaFeed]:
+    """Retrieves and validates several SOFA feeds concurrently over the shared HTTP session.
+
+    Each fetch keeps get_feed's timeout and retry behaviour, so the total time is roughly that of the slowest feed.
+    Feeds other than macOS (iOS/iPadOS, or custom mirrors of them) should be fetched with slim=True, as only the
+    slim projection's fields are shared between every SOFA feed.
+
+    Args:
+        feed_urls (List[str]): The urls from which to retrieve SOFA feeds.
+        slim (bool): Validate each feed into a SlimMacSofaFeed.
+
+    Returns:
+        Dict[str, SofaFeed]: Validated SOFA Feed objects keyed by url.
+    """
+    with ThreadPoolExecutor(max_workers=min(len(feed_urls), HTTP_POOL_SIZE) or 1) as pool:
+        feeds = pool.map(lambda url: get_feed(url, slim=slim), feed_urls)
+        return dict(zip(feed_urls, feeds))
 
 
 def get_nudge_config(config_path: str) -> NudgeConfig:
     """Retrieves and validates the Nudge configuration from the provided path.
 
+    The file's contents are kept in memory while it is unchanged on disk, so repeated runs in watch mode don't read it
+    again. Every call returns a new instance, so callers are free to modify it. The instance is rebuilt through
+    pydantic's validator, which is faster than deep-copying a previously validated model.
+
     Args:
         config_path (str): The path from which to retrieve the Nudge configuration.
 
@@ -50,30 +222,53 @@ def get_nudge_config(config_path: str) -> NudgeConfig:
         NudgeConfig: Validate Nudge Configu object
     """
     print(f"Retrieving Nudge configuration from {config_path}")
-    with open(config_path, "r", encoding="utf-8") as json:
-        return NudgeConfig.model_validate_json(json.read(), strict=True)
+    stat = os.stat(config_path)
+    file_version = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _config_cache.get(config_path)
+    if cached is not None and cached[0] == file_version:
+        return loads_nudge_config(cached[1])
+
+    with open(config_path, "rb") as json:
+        contents = json.read()
 
+    config = loads_nudge_config(contents)
+    _config_cache[config_path] = (file_version, contents)
+    return config
 
-def is_within_blackout(config: NudgeConfig) -> Tuple[bool, Optional[str]]:
+
+def is_within_blackout(config: NudgeConfig, now: Optional[datetime] = None) -> Tuple[bool, Optional[str]]:
     """Checks if we're currently in a blackout period as defined by a provided Nudge configuration.
 
     Args:
         config (NudgeConfig): The Nudge configuration used to evaluate if we're within a blackout period.
+        now (Optional[datetime]): The time to check. Defaults to the current time.
 
     Returns:
         Tuple[bool, Optional[str]]: A tuple containing a bool for if we're within a blackout of not, and if so, a string containing it's associated comment.
     """
     print("Checking if we're within a blackout period")
-    for period in config.metadata.blackout_periods:
-        if period.is_in_blackout(datetime.now()):
-            return True, period.comment
+    comment = config.metadata.blackout_calendar.lookup(now or datetime.now())
+
+    return comment is not None, comment
+
 
-    return False, None
+def read_cache(path: Path) -> AutoNudgeCache:
+    """Reads and validates the cache file, returning an empty cache if it is missing or invalid. The caller is
+    expected to hold the cache's lock."""
+    try:
+        return AutoNudgeCache.model_validate_json(path.read_bytes())
+    except (FileNotFoundError, ValidationError):
+        return AutoNudgeCache()
 
 
 def get_cache(path: str) -> AutoNudgeCache:
     """
-    Retrieves the current cache from the provided file path. If the cache isn't present, a new one will be created.
+    Retrieves the current cache from the provided file path. If the cache isn't present, an empty one is returned,
+    and the file is only created once save_cache writes it.
+
+    The cache holds an entry per SOFA feed url and per Nudge configuration path, so several runs can share one cache
+    file. It is read under a shared lock, and save_cache only writes back the entries this run changed.
 
     Args:
         path (str): The file path to retrieve the cache from.
@@ -82,79 +277,497 @@ def get_cache(path: str) -> AutoNudgeCache:
         AutoNudgeCache: The current cache. If none is present, a newly initialized cache will be returned.
     """
     cache_path = Path(path)
-    cache: AutoNudgeCache
-
-    print(f"Checking for existing cache at {cache_path}")
-    if cache_path.is_file():
-        print("Cache hit")
-    else:
-        print("No cache present - creating one")
-        open(cache_path, 'w').close() # Create empty file
 
-    with open(cache_path) as file:
-        try:
-            cache = AutoNudgeCache.model_validate_json(file.read())
-        except ValidationError as e:
+    with stage("cache_load") as span:
+        print(f"Checking for existing cache at {cache_path}")
+        span.cache_hit = cache_path.is_file()
+        if span.cache_hit:
+            print("Cache hit")
+            with file_lock(cache_path, shared=True):
+                cache = read_cache(cache_path)
+            span.bytes = cache_path.stat().st_size
+        else:
+            print("No cache present - starting with an empty one")
             cache = AutoNudgeCache()
 
+    cache.mark_saved()
     return cache
 
-def should_update_config(feed: MacSofaFeed, config: NudgeConfig) -> bool:
-    """Checks if the Nudge configuration requires updating. This is done by checking if the latest version
-    contained within the SOFA Feed is different from what the Nudge config is currently targeting.
+
+def save_cache(path: str, cache: AutoNudgeCache) -> None:
+    """Writes the cache to the provided file path.
+
+    Under an exclusive lock, the cache file is read again and only the entries changed by this run since get_cache
+    are written over it, so entries saved by other runs in the meantime are kept.
+
+    Args:
+        path (str): The file path to write the cache to.
+        cache (AutoNudgeCache): The cache to write.
+    """
+    cache_path = Path(path)
+
+    with stage("cache_write") as span:
+        with file_lock(cache_path):
+            merged = cache.merge_into(read_cache(cache_path))
+            contents = merged.model_dump_json().encode("utf-8")
+            span.bytes = len(contents)
+            span.details["written"] = write_if_changed(cache_path, contents)
+
+    cache.mark_saved()
+
+
+def write_nudge_config(path: str, config: NudgeConfig) -> bool:
+    """Serializes the Nudge configuration and atomically writes it to the provided path, if it differs from what is
+    already on disk. See nudge_config_codec for the codecs used.
+
+    Any formats listed in AUTO_NUDGE_PROFILE_FORMATS ("plist" and/or "mobileconfig") are written next to it, with the
+    same name and their own extension. They are only regenerated when the JSON changed or they don't exist yet.
+
+    Args:
+        path (str): The file path to write the Nudge configuration to.
+        config (NudgeConfig): The Nudge configuration to write.
+
+    Returns:
+        bool: True if any file was written, False if they already held the same configuration.
+    """
+    written = write_if_changed(path, dumps_nudge_config(config))
+
+    for name in PROFILE_FORMATS:
+        profile_path = Path(path).with_suffix(f".{name}")
+        if not written and profile_path.is_file():
+            continue
+
+        if name == "plist":
+            contents = dumps_plist(config, PLIST_BINARY)
+        elif name == "mobileconfig":
+            contents = dumps_mobileconfig(config, f"{PROFILE_IDENTIFIER}.{Path(path).stem}")
+        else:
+            raise ValueError(f"Unknown profile format {name!r}, expected one of {', '.join(PROFILE_FORMAT_NAMES)}")
+
+        if write_if_changed(profile_path, contents):
+            print(f"Writing {name} to {profile_path}")
+            written = True
+
+    return written
+
+
+def get_target_os_version(feed: SofaFeed, requirement: OsVersionRequirement) -> Optional[OsVersion]:
+    """Finds the OS version in the SOFA feed that a Nudge OS version requirement tracks. Requirements targeting a
+    major version (or a full version) through targetedOSVersionsRule track that major, and requirements without a
+    rule, or with the "default" rule, track the newest major in the feed.
+
+    Args:
+        feed (SofaFeed): SOFA Feed object containing a list of macOS versions.
+        requirement (OsVersionRequirement): The Nudge OS version requirement.
+
+    Returns:
+        Optional[OsVersion]: The OS version tracked by the requirement, or None if the feed doesn't contain it.
+    """
+    rule = requirement.targeted_os_versions_rule
+    if rule is None or rule == "default":
+        return feed.os_versions[0]
+
+    return feed.os_versions_by_major.get(rule.split(".")[0])
+
+
+def should_update_config(feed: SofaFeed, config: NudgeConfig) -> bool:
+    """Checks if the Nudge configuration requires updating. This is done by checking if the latest version of any
+    OS version tracked by the Nudge config's requirements is different from what that requirement is currently
+    targeting.
 
     Args:
-        feed (MacSofaFeed): SOFA Feed object containing a list of macOS versions.
+        feed (SofaFeed): SOFA Feed object containing a list of macOS versions.
         config (NudgeConfig): The current Nudge configuration object.
 
     Returns:
         bool: True if the config should be updated, False otherwise.
     """
     print("Determining if Nudge config needs to be updated")
-    return config.os_version_requirements[0].required_minimum_os_version != feed.os_versions[0].latest.product_version
 
+    for requirement in config.os_version_requirements:
+        os_version = get_target_os_version(feed, requirement)
+        if os_version is not None and requirement.required_minimum_os_version != os_version.latest.product_version:
+            return True
+
+    return False
 
-def update_config(feed: MacSofaFeed, config: NudgeConfig) -> None:
-    """Updates the provided Nudge configuration using values from the provided SOFA feed. Will update the required_minimum_os_version and the mainContentNote body text.
+
+def update_config(
+    feed: SofaFeed,
+    config: NudgeConfig,
+    force: bool = False,
+    now: Optional[datetime] = None,
+    deadline_offset: timedelta = DEADLINE_OFFSET,
+    exploited_deadline_offset: timedelta = EXPLOITED_DEADLINE_OFFSET,
+) -> None:
+    """Updates the provided Nudge configuration using values from the provided SOFA feed. Every OS version requirement
+    whose tracked OS version has a newer release gets its required_minimum_os_version and deadline updated, in a
+    single pass. The mainContentNote body text of every update element with a note template follows the deadline of
+    the first requirement, in the element's language.
 
     Args:
-        feed (MacSofaFeed): SOFA Feed object used to update the Nudge config.
+        feed (SofaFeed): SOFA Feed object used to update the Nudge config.
         config (NudgeConfig): Nudge config object to be updated.
+        force (bool): Update every requirement with a tracked OS version, even those already targeting its latest
+            release.
+        now (Optional[datetime]): The time deadlines are counted from. Defaults to the current time.
+        deadline_offset (timedelta): Time given to install a new release.
+        exploited_deadline_offset (timedelta): Time given to install a new release that fixes an actively exploited
+            CVE.
 
     Returns:
         None
     """
     print("Updating Nudge configuration")
     # Actionable changes detected. Update our config as necessary.
-    # Update target version
-    config.os_version_requirements[0].required_minimum_os_version = feed.os_versions[0].latest.product_version
-
-    # Update install deadline
-    # Set our offset to 2 weeks by default, or 1 week if the new version resolves an actively exploited CVE
-    deadline_offset = (
-        timedelta(weeks=2)
-        if len(feed.os_versions[0].security_releases[0].actively_exploited_cves) == 0
-        else timedelta(weeks=1)
-    )
-    install_deadline = datetime.now() + deadline_offset
-    config.os_version_requirements[0].required_installation_date = install_deadline.strftime("%Y-%m-%dT00:00:00Z")
+    for index, requirement in enumerate(config.os_version_requirements):
+        os_version = get_target_os_version(feed, requirement)
+        if os_version is None:
+            print(f"No SOFA feed entry for {requirement.targeted_os_versions_rule} - leaving requirement as is")
+            continue
+        if requirement.required_minimum_os_version == os_version.latest.product_version and not force:
+            continue
+
+        # Update target version
+        requirement.required_minimum_os_version = os_version.latest.product_version
+
+        # Update install deadline
+        # Use the shorter offset if the new version resolves an actively exploited CVE
+        offset = (
+            deadline_offset
+            if len(os_version.security_releases[0].actively_exploited_cves) == 0
+            else exploited_deadline_offset
+        )
+        install_deadline = (now or datetime.now()) + offset
+        requirement.required_installation_date = install_deadline.strftime("%Y-%m-%dT00:00:00Z")
+
+        # Update body text
+        if index == 0:
+            render_notes(config, install_deadline.date())
+
+
+def resolve_config_paths(config_path: str) -> Optional[List[str]]:
+    """Resolves the Nudge configuration path into the list of configurations to process in fleet mode.
+
+    Args:
+        config_path (str): A single config file, a directory of config files, or a glob pattern.
+
+    Returns:
+        Optional[List[str]]: Sorted list of config paths, or None if config_path refers to a single config file.
+    """
+    if Path(config_path).is_dir():
+        return sorted(str(path) for path in Path(config_path).glob("*.json"))
+    if glob.has_magic(config_path):
+        return sorted(glob.glob(config_path, recursive=True))
+
+    return None
+
+
+def process_config(
+    feed: SofaFeed,
+    config_path: str,
+    entry: ConfigCacheEntry,
+    force: bool = False,
+) -> ConfigResult:
+    """Runs the update pipeline for a single Nudge configuration against an already validated SOFA feed.
+
+    Args:
+        feed (SofaFeed): SOFA Feed object used to update the Nudge config.
+        config_path (str): Path of the Nudge configuration to process.
+        entry (ConfigCacheEntry): Cache entry for this configuration. Updated once the config has been processed.
+        force (bool): Ignore the cached hash and blackout periods, always updating the config.
 
-    # Update body text
-    date_string = install_deadline.strftime("%A, %B {day}, %Y").format(
-        day=num2words(install_deadline.day, to="ordinal_num")
+    Returns:
+        ConfigResult: The outcome of processing the configuration.
+    """
+    if entry.last_update_hash == feed.update_hash and not force:
+        return ConfigResult(config_path, "current")
+
+    try:
+        config = get_nudge_config(config_path)
+
+        in_blackout, reason = is_within_blackout(config)
+        if in_blackout and not force:
+            return ConfigResult(config_path, "blackout", reason)
+
+        status = "unchanged"
+        if should_update_config(feed, config) or force:
+            update_config(feed, config, force)
+
+            print(f"Writing changes to {config_path}")
+            if write_nudge_config(config_path, config):
+                status = "updated"
+    except Exception as e:
+        return ConfigResult(config_path, "error", str(e))
+
+    entry.last_update_hash = feed.update_hash
+    return ConfigResult(
+        config_path,
+        status,
+        target_version=config.os_version_requirements[0].required_minimum_os_version,
     )
-    config.user_interface.update_elements[0].main_content_note = config.metadata.note_template.format(date_string)
+
+
+def run_fleet(
+    feed: SofaFeed,
+    config_paths: List[str],
+    cache: AutoNudgeCache,
+    force: bool = False,
+    feed_url: Optional[str] = None,
+) -> List[ConfigResult]:
+    """Processes every provided Nudge configuration against a single SOFA feed using a worker pool.
+
+    The feed's cached hash is only advanced once every configuration has been processed, so configurations
+    skipped due to a blackout or an error are retried on the next run.
+
+    Args:
+        feed (SofaFeed): SOFA Feed object used to update the Nudge configs.
+        config_paths (List[str]): Paths of the Nudge configurations to process.
+        cache (AutoNudgeCache): Cache holding per-config state.
+        force (bool): Ignore cached hashes and blackout periods, always updating the configs.
+        feed_url (Optional[str]): Url the feed was retrieved from. Defaults to MACOS_SOFA_FEED_URL.
+
+    Returns:
+        List[ConfigResult]: The outcome of processing each configuration, in the order provided.
+    """
+    print(f"Processing {len(config_paths)} Nudge configurations")
+    entries = [cache.configs.setdefault(path, ConfigCacheEntry()) for path in config_paths]
+
+    with ThreadPoolExecutor(max_workers=FLEET_WORKERS) as pool:
+        results = list(pool.map(lambda args: process_config(feed, *args, force), zip(config_paths, entries)))
+
+    feed_cache = cache.feed(feed_url or MACOS_SOFA_FEED_URL)
+    if all(result.status in ("updated", "unchanged", "current") for result in results):
+        feed_cache.record_update_hash(feed.update_hash)
+    else:
+        # Drop the validators so the next run re-downloads the feed and retries the remaining configs
+        feed_cache.etag = None
+        feed_cache.last_modified = None
+
+    return results
+
+
+def write_run_report(report: RunReport) -> None:
+    """Writes the run report as JSON to REPORT_PATH and, on Github Actions, as a Markdown table to the job summary.
+
+    Args:
+        report (RunReport): The report of the finished run.
+    """
+    write_atomic(REPORT_PATH, report.model_dump_json(indent=4).encode("utf-8"))
+
+    if os.getenv("GITHUB_ACTIONS") and os.getenv("GITHUB_STEP_SUMMARY"):
+        with open(os.environ["GITHUB_STEP_SUMMARY"], "a") as summary:
+            summary.write(report.to_markdown())
+
+
+def run_reported() -> int:
+    """Runs the update pipeline once, writing a run report however it ends.
+
+    Returns:
+        int: The exit code the pipeline ended with.
+    """
+    report = start_report()
+    start = time.perf_counter()
+
+    try:
+        run()
+        report.exit_code = 0
+    except SystemExit as e:
+        report.exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException:
+        report.exit_code = 1
+        raise
+    finally:
+        report.total_ms = (time.perf_counter() - start) * 1000
+        try:
+            write_run_report(report)
+        except OSError as e:
+            print(f"Unable to write run report to {REPORT_PATH}: {e}")
+
+    return report.exit_code
+
+
+def get_watch_interval(cache_path: str, previous: Optional[float]) -> float:
+    """Picks the delay until the next poll in watch mode. Polling tightens to WATCH_MIN_INTERVAL right after the
+    feed changes, then backs off exponentially up to WATCH_MAX_INTERVAL while it stays idle.
+
+    Args:
+        cache_path (str): Path of the cache, used to check when the feed last changed.
+        previous (Optional[float]): The previous interval, or None before the first poll.
+
+    Returns:
+        float: Seconds to wait before the next poll.
+    """
+    last_changed_at = None
+    if Path(cache_path).is_file():
+        try:
+            cache = AutoNudgeCache.model_validate_json(Path(cache_path).read_bytes())
+            last_changed_at = cache.feed(MACOS_SOFA_FEED_URL).last_changed_at
+        except ValidationError:
+            pass
+
+    if last_changed_at is not None:
+        since_change = (datetime.now(timezone.utc) - datetime.fromisoformat(last_changed_at)).total_seconds()
+        if since_change < (previous or WATCH_MIN_INTERVAL):
+            return WATCH_MIN_INTERVAL
+
+    if previous is None:
+        return WATCH_MIN_INTERVAL
+
+    return min(previous * 2, WATCH_MAX_INTERVAL)
+
+
+def watch() -> None:
+    """Keeps the process running, polling the SOFA feed and running the update pipeline in-process on every poll.
+
+    The HTTP session and parsed Nudge configurations stay warm between polls. NUDGE_FORCE_UPDATE only applies to
+    the first poll. Stops cleanly on SIGINT or SIGTERM.
+    """
+    global FORCE_UPDATE
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    print(f"Watching {MACOS_SOFA_FEED_URL} every {WATCH_MIN_INTERVAL:g}-{WATCH_MAX_INTERVAL:g}s")
+    interval = None
+    while not stop.is_set():
+        try:
+            exit_code = run_reported()
+            if exit_code != 0:
+                print(f"Update pipeline exited with code {exit_code}")
+        except Exception as e:
+            print(f"Error occurred while running the update pipeline: {e}")
+        FORCE_UPDATE = False
+
+        interval = get_watch_interval(CACHE_PATH, interval)
+        print(f"Next poll in {interval:g}s")
+        stop.wait(interval)
+
+    print("Stopping watch")
+
+
+def sanitize_commit_message(text: str) -> str:
+    """Strips a commit message down to characters that are safe to pass through GITHUB_ENV and a shell, as parts of
+    it such as release names and XProtect versions are taken from the SOFA feed."""
+    return UNSAFE_COMMIT_CHARACTERS.sub("", text)
+
+
+def write_github_env(
+    commit_msg: str, config_changed: bool, changes: Optional[FeedChangeSet] = None, configs_failed: int = 0
+) -> None:
+    """Sets the environment variables read by the workflow's commit step.
+
+    Args:
+        commit_msg (str): Commit message for the updated configs, or an empty string if none were updated.
+        config_changed (bool): Whether any Nudge configuration was written.
+        changes (Optional[FeedChangeSet]): Changes since the previous feed, summarized in the commit message.
+        configs_failed (int): Number of configurations that failed to process in fleet mode.
+    """
+    print(f"Github environment detected. Setting environment variables.")
+    if commit_msg and changes is not None:
+        commit_msg += f" ({sanitize_commit_message(changes.summary())})"
+
+    with open(os.environ["GITHUB_ENV"], "a") as env:
+        for env_var in (
+            f"COMMIT_MSG='{commit_msg}'",
+            f"CONFIG_CHANGED={config_changed}",
+            f"CONFIGS_FAILED={configs_failed}",
+        ):
+            print(env_var)
+            env.write(f"{env_var}\n")
+
+
+def get_feed_changes(store: FeedSnapshotStore, previous_hash: Optional[str], feed: SofaFeed) -> Optional[FeedChangeSet]:
+    """Diffs a newly downloaded feed against the feed the configs were last processed against, loaded from the
+    snapshot store or, failing that, the feed history.
+
+    Args:
+        store (FeedSnapshotStore): Local store of previously downloaded feeds.
+        previous_hash (Optional[str]): UpdateHash of the previous feed.
+        feed (SofaFeed): The newly downloaded feed.
+
+    Returns:
+        Optional[FeedChangeSet]: The changes, or None if the previous feed isn't available locally.
+    """
+    if not previous_hash or previous_hash == feed.update_hash:
+        return None
+
+    try:
+        with stage("feed_diff") as span:
+            previous = store.load(previous_hash, type(feed))
+            if previous is None:
+                previous = FeedHistoryStore(HISTORY_DIR, HISTORY_REBASE_INTERVAL).load(previous_hash, type(feed))
+            if previous is None:
+                span.details["previous_available"] = False
+                return None
+
+            changes = diff_feeds(previous, feed)
+            span.details["changes"] = ",".join(change.kind.value for change in changes.changes)
+    except Exception as e:
+        print(f"Unable to compare against previous SOFA feed release {previous_hash}: {e}")
+        return None
+
+    print(f"Changes since SOFA feed release {previous_hash}: {changes.summary()}")
+    return changes
+
+
+def record_history(store: FeedSnapshotStore, update_hash: str) -> None:
+    """Records a newly downloaded feed revision in the feed history. Failing to do so never fails the run.
+
+    Args:
+        store (FeedSnapshotStore): Snapshot store holding the raw bytes of the feed.
+        update_hash (str): UpdateHash of the feed.
+    """
+    try:
+        raw = store.get_raw(update_hash)
+        if raw is None:
+            return
+
+        with stage("history_record") as span:
+            span.bytes = len(raw)
+            span.details["recorded"] = FeedHistoryStore(HISTORY_DIR, HISTORY_REBASE_INTERVAL).add(update_hash, raw)
+    except Exception as e:
+        print(f"Unable to record SOFA feed release {update_hash} in history at {HISTORY_DIR}: {e}")
 
 
 def main():
-    sofa_feed: MacSofaFeed
+    # Fail before anything is written, rather than after the JSON config has been updated
+    unknown_formats = [name for name in PROFILE_FORMATS if name not in PROFILE_FORMAT_NAMES]
+    if unknown_formats:
+        print(
+            f"Unknown profile format(s) {', '.join(unknown_formats)} in AUTO_NUDGE_PROFILE_FORMATS, "
+            f"expected {' and/or '.join(PROFILE_FORMAT_NAMES)}"
+        )
+        exit(1)
+
+    if WATCH:
+        watch()
+    else:
+        exit(run_reported())
+
+
+def run():
+    sofa_feed: Optional[SofaFeed]
     nudge_config: NudgeConfig
     config_updated = False
     cache = get_cache(CACHE_PATH)
+    feed_cache = cache.feed(MACOS_SOFA_FEED_URL)
+    store = FeedSnapshotStore(SNAPSHOT_DIR, SNAPSHOT_LIMIT)
 
     # Retrieve macOS SOFA feed
     try:
-        sofa_feed = get_feed(MACOS_SOFA_FEED_URL)
+        if OFFLINE_FEED_HASH:
+            print(f"Loading SOFA feed release {OFFLINE_FEED_HASH} from local snapshot")
+            with stage("feed_validate") as span:
+                span.details["source"] = "snapshot"
+                sofa_feed = store.load(OFFLINE_FEED_HASH, get_feed_model(SLIM_FEED))
+            if sofa_feed is None:
+                raise FileNotFoundError(f"No local snapshot stored for {OFFLINE_FEED_HASH} in {SNAPSHOT_DIR}")
+            if sofa_feed.update_hash == feed_cache.last_update_hash and not FORCE_UPDATE:
+                sofa_feed = None
+        else:
+            sofa_feed = get_feed(MACOS_SOFA_FEED_URL, feed_cache, FORCE_UPDATE, SLIM_FEED, store)
     except ValidationError as e:
         print(f"Error occurred while validating SOFA feed: {e}")
         exit(1)
@@ -166,20 +779,33 @@ def main():
         exit(1)
 
     # Check if we need to update our nudge configuration.
-    if cache.last_update_hash == sofa_feed.update_hash and not FORCE_UPDATE:
-        print(f"Nudge config already targeting current SOFA feed release {cache.last_update_hash}. Exiting.")
+    if sofa_feed is None:
+        print(f"Nudge config already targeting current SOFA feed release {feed_cache.last_update_hash}. Exiting.")
+        # Persist any new validators so the next run can be answered with a 304
+        save_cache(CACHE_PATH, cache)
         exit(0)
     else:
         print(f"New SOFA feed release detected, hash {sofa_feed.update_hash}")
+        record_history(store, sofa_feed.update_hash)
+
+    changes = None if FORCE_UPDATE else get_feed_changes(store, feed_cache.last_update_hash, sofa_feed)
+
+    config_paths = resolve_config_paths(NUDGE_CONFIG_PATH)
+    if config_paths is not None:
+        main_fleet(sofa_feed, config_paths, cache, changes)
 
     # Retrieve nudge config
     try:
-        nudge_config = get_nudge_config(NUDGE_CONFIG_PATH)
+        with stage("config_load") as span:
+            span.bytes = os.path.getsize(NUDGE_CONFIG_PATH)
+            nudge_config = get_nudge_config(NUDGE_CONFIG_PATH)
     except Exception as e:
         print(f"Error occurred while attempting to retrieve nudge config from {NUDGE_CONFIG_PATH}: {e}")
         exit(1)
 
-    in_blackout, reason = is_within_blackout(nudge_config)
+    with stage("blackout_check") as span:
+        in_blackout, reason = is_within_blackout(nudge_config)
+        span.details["in_blackout"] = in_blackout
 
     if in_blackout and not FORCE_UPDATE:
         print(f"Currently within blackout period: {reason}. Exiting.")
@@ -188,45 +814,40 @@ def main():
     print("Outside blackout period - safe to proceed")
 
     # Update our metadata and update the nudge configuration if necessary.
-    cache.last_update_hash = sofa_feed.update_hash
+    feed_cache.record_update_hash(sofa_feed.update_hash)
 
     if should_update_config(sofa_feed, nudge_config) or FORCE_UPDATE:
         print("Nudge configuration requires updating")
-        update_config(sofa_feed, nudge_config)
+        update_config(sofa_feed, nudge_config, FORCE_UPDATE)
 
         print(f"Writing changes to {NUDGE_CONFIG_PATH}")
-        with open(NUDGE_CONFIG_PATH, "w") as file:
-            file.write(nudge_config.model_dump_json(indent=4, exclude_none=True, by_alias=True))
+        with stage("config_write") as span:
+            config_updated = write_nudge_config(NUDGE_CONFIG_PATH, nudge_config)
+            span.bytes = os.path.getsize(NUDGE_CONFIG_PATH)
+            span.details["written"] = config_updated
 
-        config_updated = True
+        if not config_updated:
+            print("Nudge configuration already up to date on disk.")
     else:
         print("No changes required.")
 
     # Update cache
     print(f"Updating cache")
-    with open(CACHE_PATH, "w") as file:
-        file.write(cache.model_dump_json())
+    save_cache(CACHE_PATH, cache)
 
     print("Determining runtime environment")
     if os.getenv("GITHUB_ACTIONS"):
-        print(f"Github environment detected. Setting environment variables.")
-        with open(os.environ["GITHUB_ENV"], "a") as env:
-            commit_msg = ""
-
-            if config_updated:
-                commit_msg = f"Update required_minimum_os_version to {nudge_config.os_version_requirements[0].required_minimum_os_version}"
-
-            env_var = f"COMMIT_MSG='{commit_msg}'"
-            print(env_var)
-            env.write(f"{env_var}\n")
-
-            env_var = f"CONFIG_CHANGED={config_updated}"
-            print(env_var)
-            env.write(f"{env_var}\n")
+        commit_msg = ""
+        if config_updated:
+            versions = ", ".join(
+                requirement.required_minimum_os_version for requirement in nudge_config.os_version_requirements
+            )
+            commit_msg = f"Update required_minimum_os_version to {versions}"
+        write_github_env(commit_msg, config_updated, changes)
     else:
         print(f"Local environment detected. Printing results.")
         print("")
-        print(f"SOFA Feed Hash: {cache.last_update_hash}")
+        print(f"SOFA Feed Hash: {feed_cache.last_update_hash}")
         print(f"Config updated: {config_updated}")
         print(f"Targeted version: {nudge_config.os_version_requirements[0].required_minimum_os_version}")
         print(f"Deadline: {nudge_config.os_version_requirements[0].required_installation_date}")
@@ -235,5 +856,40 @@ def main():
     exit(0)
 
 
+def main_fleet(
+    sofa_feed: SofaFeed, config_paths: List[str], cache: AutoNudgeCache, changes: Optional[FeedChangeSet] = None
+):
+    with stage("fleet_update") as span:
+        results = run_fleet(sofa_feed, config_paths, cache, FORCE_UPDATE)
+        for status in ("updated", "unchanged", "current", "blackout", "error"):
+            span.details[status] = sum(result.status == status for result in results)
+    updated = [result for result in results if result.status == "updated"]
+    failed = [result for result in results if result.status == "error"]
+
+    # Update cache
+    print(f"Updating cache")
+    save_cache(CACHE_PATH, cache)
+
+    print("")
+    print("Fleet summary")
+    for result in results:
+        print(f"  {result.status:<10} {result.path}" + (f" ({result.target_version})" if result.target_version else ""))
+        if result.detail:
+            print(f"  {'':<10} {result.detail}")
+    print(f"{len(updated)} updated, {len(failed)} failed, {len(results)} total")
+
+    print("Determining runtime environment")
+    if os.getenv("GITHUB_ACTIONS"):
+        commit_msg = ""
+        if updated:
+            versions = ", ".join(sorted({result.target_version for result in updated}))
+            commit_msg = f"Update required_minimum_os_version to {versions} in {len(updated)} configs"
+        write_github_env(commit_msg, len(updated) > 0, changes, configs_failed=len(failed))
+
+    # Done. Failures only fail the run when nothing was updated, so configs that were updated still reach a PR. The
+    # workflow fails the job afterwards from CONFIGS_FAILED.
+    exit(1 if failed and not updated else 0)
+
+
 if __name__ == "__main__":
     main()
@@ -1,9 +1,102 @@
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
-class AutoNudgeCache(BaseModel):
+# Key of the feed state migrated from caches written before feeds were keyed by url. The first feed looked up adopts it.
+UNKEYED_FEED = ""
+
+
+class FeedCacheEntry(BaseModel):
     last_update_hash: Optional[str] = Field(
         "",
-        description="",
-    )
\ No newline at end of file
+        description="UpdateHash of the last processed SOFA feed.",
+    )
+    etag: Optional[str] = Field(
+        None,
+        description="ETag header returned with the last processed SOFA feed, sent back as If-None-Match.",
+    )
+    last_modified: Optional[str] = Field(
+        None,
+        description="Last-Modified header returned with the last processed SOFA feed, sent back as If-Modified-Since.",
+    )
+    last_changed_at: Optional[str] = Field(
+        None,
+        description="UTC timestamp of when a new SOFA feed hash was last recorded.",
+    )
+
+    def record_update_hash(self, update_hash: str) -> None:
+        """Records the hash of a processed SOFA feed, noting when it last changed."""
+        if update_hash != self.last_update_hash:
+            self.last_changed_at = datetime.now(timezone.utc).isoformat()
+        self.last_update_hash = update_hash
+
+
+class ConfigCacheEntry(BaseModel):
+    last_update_hash: Optional[str] = Field(
+        "",
+        description="UpdateHash of the SOFA feed this Nudge configuration was last processed against.",
+    )
+
+
+class AutoNudgeCache(BaseModel):
+    feeds: Dict[str, FeedCacheEntry] = Field(
+        default_factory=dict,
+        description="Per-feed state, keyed by SOFA feed url.",
+    )
+    configs: Dict[str, ConfigCacheEntry] = Field(
+        default_factory=dict,
+        description="Per-config state used in fleet mode, keyed by Nudge configuration path.",
+    )
+
+    # Entries as they were when the cache was loaded or last saved, used to tell which ones this run changed
+    _saved: Dict[str, Dict[str, Any]] = PrivateAttr(default_factory=dict)
+
+    @model_validator(mode="before")
+    @classmethod
+    def migrate_unkeyed_feed(cls, data: Any) -> Any:
+        """Moves the single feed's state held at the top level of older caches into feeds."""
+        if not isinstance(data, dict) or not any(field in data for field in FeedCacheEntry.model_fields):
+            return data
+
+        data = dict(data)
+        entry = {field: data.pop(field) for field in FeedCacheEntry.model_fields if field in data}
+        data["feeds"] = {UNKEYED_FEED: entry, **(data.get("feeds") or {})}
+        return data
+
+    def feed(self, url: str) -> FeedCacheEntry:
+        """Returns the state of a SOFA feed, creating it if the feed hasn't been seen before."""
+        entry = self.feeds.get(url)
+        if entry is None:
+            entry = self.feeds[url] = self.feeds.pop(UNKEYED_FEED, None) or FeedCacheEntry()
+
+        return entry
+
+    def mark_saved(self) -> None:
+        """Records the current entries as the ones on disk, so only entries changed from here on are merged."""
+        self._saved = {
+            "feeds": {url: entry.model_dump() for url, entry in self.feeds.items()},
+            "configs": {path: entry.model_dump() for path, entry in self.configs.items()},
+        }
+
+    def merge_into(self, current: "AutoNudgeCache") -> "AutoNudgeCache":
+        """Applies the entries changed since the cache was loaded onto a fresher copy of it, leaving entries written
+        in the meantime by other runs untouched.
+
+        Args:
+            current (AutoNudgeCache): The cache as it is now on disk.
+
+        Returns:
+            AutoNudgeCache: current, with this cache's changes applied.
+        """
+        for section in ("feeds", "configs"):
+            saved = self._saved.get(section, {})
+            ours = getattr(self, section)
+            theirs = getattr(current, section)
+            for key, entry in ours.items():
+                if saved.get(key) != entry.model_dump():
+                    theirs[key] = entry.model_copy()
+            for key in saved.keys() - ours.keys():
+                theirs.pop(key, None)
+
+        return current
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from calendar import isleap
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+# Day-of-year offset for the first of each month, using a leap year so that 02/29 has a slot of its own
+_MONTH_OFFSETS = [0, 0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335]
+DAYS_IN_TABLE = 366
+
+
+def day_index(month: int, day: int) -> int:
+    """Converts a month-day pair into its slot in a 366-entry day-of-year table."""
+    return _MONTH_OFFSETS[month] + day - 1
+
+
+@lru_cache(maxsize=2)
+def _year_indexes(leap: bool) -> List[int]:
+    """Table slots for each day of a year, in order. Non-leap years skip the 02/29 slot."""
+    return [index for index in range(DAYS_IN_TABLE) if leap or index != day_index(2, 29)]
+
+
+class BlackoutCalendar:
+    """Blackout periods compiled into a 366-entry day-of-year table.
+
+    Each slot holds the comment of the first blackout period covering that month-day, or None, so any date can be
+    checked in constant time without re-parsing the MM/DD strings. Calendars are shared between configurations that
+    declare the same periods.
+    """
+
+    def __init__(self, table: List[Optional[str]]):
+        self.table = table
+
+    @classmethod
+    def compile(cls, periods: Optional[Iterable]) -> BlackoutCalendar:
+        """Compiles a collection of BlackoutPeriods into a calendar.
+
+        Args:
+            periods (Optional[Iterable[BlackoutPeriod]]): Blackout periods, in priority order.
+
+        Returns:
+            BlackoutCalendar: The compiled calendar.
+        """
+        return cls._compile(tuple((period.start, period.end, period.comment) for period in periods or ()))
+
+    @classmethod
+    @lru_cache(maxsize=128)
+    def _compile(cls, periods: Tuple[Tuple[str, str, str], ...]) -> BlackoutCalendar:
+        table: List[Optional[str]] = [None] * DAYS_IN_TABLE
+
+        # Fill in reverse so that earlier periods take precedence where periods overlap
+        for start, end, comment in reversed(periods):
+            start_index = day_index(*map(int, start.split("/")))
+            end_index = day_index(*map(int, end.split("/")))
+
+            # Handle ranges that wrap around the new year (e.g., Dec 15 - Jan 10)
+            if start_index <= end_index:
+                indexes = range(start_index, end_index + 1)
+            else:
+                indexes = [*range(start_index, DAYS_IN_TABLE), *range(0, end_index + 1)]
+
+            for index in indexes:
+                table[index] = comment
+
+        return cls(table)
+
+    def lookup(self, day: date) -> Optional[str]:
+        """Finds the blackout period covering a date.
+
+        Args:
+            day (date): Date to check.
+
+        Returns:
+            Optional[str]: The comment of the blackout period covering the date, or None if it isn't blacked out.
+        """
+        return self.table[day_index(day.month, day.day)]
+
+    def is_blacked_out(self, day: date) -> bool:
+        return self.lookup(day) is not None
+
+    def lookup_range(self, start: date, days: int) -> List[Optional[str]]:
+        """Looks up every date in a range at once.
+
+        Args:
+            start (date): First date of the range.
+            days (int): Number of consecutive dates to look up.
+
+        Returns:
+            List[Optional[str]]: The blackout comment, or None, for each date in the range.
+        """
+        result: List[Optional[str]] = []
+        year = start.year
+        position = start.timetuple().tm_yday - 1
+        while len(result) < days:
+            indexes = _year_indexes(isleap(year))
+            result.extend(map(self.table.__getitem__, indexes[position : position + days - len(result)]))
+            year += 1
+            position = 0
+
+        return result
+
+    def next_open_day(self, after: date, inclusive: bool = False) -> Optional[date]:
+        """Finds the first date that isn't blacked out.
+
+        Args:
+            after (date): Date to start searching from.
+            inclusive (bool): Whether the starting date itself may be returned.
+
+        Returns:
+            Optional[date]: The first open date, or None if every day of the year is blacked out.
+        """
+        start = after if inclusive else after + timedelta(days=1)
+        for offset, comment in enumerate(self.lookup_range(start, DAYS_IN_TABLE)):
+            if comment is None:
+                return start + timedelta(days=offset)
+
+        return None
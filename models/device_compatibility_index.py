@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+from models.feed_index_cache import FeedIndexCache
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import MacSofaFeed
+
+_index_cache: FeedIndexCache[DeviceCompatibilityIndex] = FeedIndexCache()
+
+
+class DeviceCompatibilityIndex:
+    """Maps devices to the macOS releases they can install, built once per feed UpdateHash.
+
+    Every release in the feed is given a bit position, and every board ID (for example 'J413AP') and model identifier
+    (for example 'MacBookAir10,1') is interned and mapped to a bitset of the releases it supports. Checking whether a
+    device can install a release is a dictionary lookup and a bit test, regardless of how many devices or releases the
+    feed lists.
+    """
+
+    def __init__(self, feed: MacSofaFeed):
+        self.update_hash = feed.update_hash
+        self.release_bits: Dict[str, int] = {}
+        self.major_masks: Dict[str, int] = {}
+        self.device_bits: Dict[str, int] = {}
+        self.board_by_model: Dict[str, str] = {}
+
+        for os_version in feed.os_versions:
+            major = os_version.latest.product_version.split(".")[0]
+            latest_devices = os_version.latest.supported_devices
+            releases = [(os_version.latest.product_version, latest_devices)]
+            # Releases without their own device list inherit the major version's current list
+            releases += [
+                (release.product_version, release.supported_devices or latest_devices)
+                for release in os_version.security_releases
+            ]
+
+            for version, devices in releases:
+                if version not in self.release_bits:
+                    self.release_bits[version] = 1 << len(self.release_bits)
+                bit = self.release_bits[version]
+                self.major_masks[major] = self.major_masks.get(major, 0) | bit
+                for device in devices:
+                    device = sys.intern(device)
+                    self.device_bits[device] = self.device_bits.get(device, 0) | bit
+
+            for model in os_version.supported_models:
+                for model_identifier, board_id in model.identifiers.items():
+                    self.board_by_model.setdefault(sys.intern(model_identifier), sys.intern(board_id))
+
+        # The Models catalog lists supported majors per model identifier rather than per release
+        for model_identifier, model in feed.models.items():
+            mask = 0
+            for major in model.os_versions:
+                mask |= self.major_masks.get(str(major), 0)
+            model_identifier = sys.intern(model_identifier)
+            self.device_bits[model_identifier] = self.device_bits.get(model_identifier, 0) | mask
+
+    @classmethod
+    def for_feed(cls, feed: MacSofaFeed) -> DeviceCompatibilityIndex:
+        """Returns the index for a feed, reusing the one already built for the same UpdateHash if present.
+
+        Args:
+            feed (MacSofaFeed): The feed to index.
+
+        Returns:
+            DeviceCompatibilityIndex: The feed's index.
+        """
+        return _index_cache.get(feed, cls)
+
+    def release_mask(self, version: str) -> int:
+        """Returns the bit for a release. Versions the feed doesn't list, for example a minimum version of '15' or a
+        release that has since dropped out of the feed, match any release of the same major version.
+
+        Args:
+            version (str): Product version, for example '14.4.1'.
+
+        Returns:
+            int: The bitmask to test device bitsets against. 0 if the major version isn't in the feed.
+        """
+        return self.release_bits.get(version) or self.major_masks.get(version.split(".")[0], 0)
+
+    def device_mask(self, device: str) -> int:
+        """Returns the bitset of releases a board ID or model identifier supports."""
+        bits = self.device_bits.get(device, 0)
+        board_id = self.board_by_model.get(device)
+        if board_id is not None:
+            bits |= self.device_bits.get(board_id, 0)
+
+        return bits
+
+    def supports(self, device: str, version: str) -> bool:
+        """Checks whether a device can install a release.
+
+        Args:
+            device (str): Board ID or model identifier of the device.
+            version (str): Product version, typically a Nudge config's required_minimum_os_version.
+
+        Returns:
+            bool: True if the device can install the release.
+        """
+        return bool(self.device_mask(device) & self.release_mask(version))
+
+    def supports_many(self, devices: Iterable[str], version: str) -> List[bool]:
+        """Checks a whole device inventory against a release at once. Each distinct device is only resolved once.
+
+        Args:
+            devices (Iterable[str]): Board IDs or model identifiers, one per device.
+            version (str): Product version, typically a Nudge config's required_minimum_os_version.
+
+        Returns:
+            List[bool]: Whether each device can install the release, in the order given.
+        """
+        mask = self.release_mask(version)
+        resolved: Dict[str, bool] = {}
+        results = []
+        for device in devices:
+            supported = resolved.get(device)
+            if supported is None:
+                supported = resolved[device] = bool(self.device_mask(device) & mask)
+            results.append(supported)
+
+        return results
+
+    def supported_versions(self, device: str) -> List[str]:
+        """Lists every release in the feed a device can install."""
+        bits = self.device_mask(device)
+        return [version for version, bit in self.release_bits.items() if bits & bit]
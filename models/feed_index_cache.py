@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import MacSofaFeed
+
+MAX_CACHED_INDEXES = 4
+
+T = TypeVar("T")
+
+
+class FeedIndexCache(Generic[T]):
+    """Least recently used cache of lookup tables built from a SOFA feed, keyed by the feed's UpdateHash. Feeds with
+    the same UpdateHash share one table, so it is only built once however many times the feed is loaded."""
+
+    def __init__(self, max_size: int = MAX_CACHED_INDEXES):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, T]" = OrderedDict()
+
+    def get(self, feed: MacSofaFeed, build: Callable[[MacSofaFeed], T]) -> T:
+        """Returns the table for a feed, building it if none is cached for the feed's UpdateHash.
+
+        Args:
+            feed (MacSofaFeed): The feed to index.
+            build (Callable[[MacSofaFeed], T]): Builds the table from the feed.
+
+        Returns:
+            T: The feed's table.
+        """
+        entry = self._entries.get(feed.update_hash)
+        if entry is None:
+            entry = build(feed)
+            self._entries[feed.update_hash] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(feed.update_hash)
+
+        return entry
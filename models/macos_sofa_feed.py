@@ -1,9 +1,28 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, TypeVar, Union
 
 from pydantic import BaseModel, Field
 
+from models.sofa_feed_header import SofaFeedHeader  # noqa: F401 - re-exported alongside the full feed schema
+
+if TYPE_CHECKING:
+    from models.device_compatibility_index import DeviceCompatibilityIndex
+    from models.sofa_feed_index import SofaFeedIndex
+
+_OsVersionT = TypeVar("_OsVersionT")
+
+
+def index_by_major(os_versions: Sequence[_OsVersionT]) -> Dict[str, _OsVersionT]:
+    """Indexes OS versions by the major version of their latest release, for example '14'. The first entry wins if
+    a major appears more than once, matching the feed's newest-first ordering."""
+    index: Dict[str, _OsVersionT] = {}
+    for os_version in os_versions:
+        index.setdefault(os_version.latest.product_version.split(".")[0], os_version)
+
+    return index
+
 
 class Latest(BaseModel):
     product_version: str = Field(
@@ -189,3 +208,67 @@ class MacSofaFeed(BaseModel):
         alias="InstallationApps",
         description="'Universal Mac Assistant' installer info, which put for example 'Install macOS Sonoma.app' in the Applications folder",
     )
+
+    @cached_property
+    def os_versions_by_major(self) -> Dict[str, OsVersion]:
+        """OS versions keyed by major version, for example '14'. Built once per feed."""
+        return index_by_major(self.os_versions)
+
+    @property
+    def index(self) -> SofaFeedIndex:
+        """Version, build and CVE lookup tables for this feed. Built once per UpdateHash."""
+        from models.sofa_feed_index import SofaFeedIndex
+
+        return SofaFeedIndex.for_feed(self)
+
+    @property
+    def compatibility(self) -> DeviceCompatibilityIndex:
+        """Board ID and model identifier to supported release lookups for this feed. Built once per UpdateHash."""
+        from models.device_compatibility_index import DeviceCompatibilityIndex
+
+        return DeviceCompatibilityIndex.for_feed(self)
+
+
+class SlimLatest(BaseModel):
+    product_version: str = Field(..., alias="ProductVersion", description="Matches Latest.ProductVersion")
+    build: str = Field(..., alias="Build", description="Matches Latest.Build")
+    release_date: str = Field(..., alias="ReleaseDate", description="Matches Latest.ReleaseDate")
+
+
+class SlimSecurityRelease(BaseModel):
+    product_version: str = Field(..., alias="ProductVersion", description="Matches SecurityRelease.ProductVersion")
+    actively_exploited_cves: List[str] = Field(
+        ...,
+        alias="ActivelyExploitedCVEs",
+        description="Matches SecurityRelease.ActivelyExploitedCVEs",
+    )
+
+
+class SlimOsVersion(BaseModel):
+    os_version: str = Field(..., alias="OSVersion", description="Matches OsVersion.OSVersion")
+    latest: SlimLatest = Field(..., alias="Latest", description="Matches OsVersion.Latest")
+    security_releases: List[SlimSecurityRelease] = Field(
+        ...,
+        alias="SecurityReleases",
+        description="Matches OsVersion.SecurityReleases",
+        min_length=1,
+    )
+
+
+class SlimMacSofaFeed(BaseModel):
+    """Projection of the SOFA feed holding only the sections needed to update a Nudge configuration.
+
+    Device catalogs, supported models, CVE maps, XProtect and installer data are skipped during validation, so parse
+    time and memory stay flat as Apple's release history grows.
+    """
+
+    update_hash: str = Field(..., alias="UpdateHash", description="Matches MacSofaFeed.UpdateHash")
+    os_versions: List[SlimOsVersion] = Field(..., alias="OSVersions", description="Matches MacSofaFeed.OSVersions")
+
+    @cached_property
+    def os_versions_by_major(self) -> Dict[str, SlimOsVersion]:
+        """OS versions keyed by major version, for example '14'. Built once per feed."""
+        return index_by_major(self.os_versions)
+
+
+SofaFeed = Union[MacSofaFeed, SlimMacSofaFeed]
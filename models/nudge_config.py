@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional, Tuple
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
+from models.blackout_calendar import BlackoutCalendar
+
 
 class OptionalFeatures(BaseModel):
     acceptable_application_bundle_ids: Optional[List[str]] = Field(
@@ -586,8 +589,7 @@ class BlackoutPeriod(BaseModel):
             bool: True if within the range, False otherwise.
         """
         compare_date = (date.month, date.day)
-        start_month_day = tuple(map(int, self.start.split("/")))
-        end_month_day = tuple(map(int, self.end.split("/")))
+        start_month_day, end_month_day = self.month_days
 
         # Handle ranges that wrap around the new year (e.g., Dec 15 - Jan 10)
         if start_month_day <= end_month_day:
@@ -595,6 +597,11 @@ class BlackoutPeriod(BaseModel):
         else:
             return compare_date >= start_month_day or compare_date <= end_month_day
 
+    @cached_property
+    def month_days(self) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """The start and end of the blackout as (month, day) pairs, parsed once."""
+        return tuple(map(int, self.start.split("/"))), tuple(map(int, self.end.split("/")))
+
 
 class NudgeMetadata(BaseModel):
     blackout_periods: List[BlackoutPeriod] = Field(
@@ -605,6 +612,16 @@ class NudgeMetadata(BaseModel):
         description="Text template to be used when updating mainContentNote. Placeholders should be in {} format.",
         examples=["⚠️  Updates must be installed prior to {install_deadline}  ⚠️"],
     )
+    note_templates: Optional[Dict[str, str]] = Field(
+        None,
+        description="Per-language templates for mainContentNote, keyed by the _language of an updateElements entry, for example 'de' or 'pt_BR'. Entries without a template of their own keep their note, except the first entry, which uses note_template.",
+        examples=[{"de": "⚠️  Updates müssen vor {install_deadline} installiert werden  ⚠️"}],
+    )
+
+    @property
+    def blackout_calendar(self) -> BlackoutCalendar:
+        """The blackout periods compiled into a day-of-year index. Compiled calendars are cached by their periods."""
+        return BlackoutCalendar.compile(self.blackout_periods)
 
 
 class NudgeConfig(BaseModel):
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class SofaFeedHeader(BaseModel):
+    """Top-level fields of a SOFA feed that can be read without validating the whole document.
+
+    Kept apart from the full feed schema so that checking for a new release doesn't import or build it.
+    """
+
+    update_hash: str = Field(
+        ...,
+        alias="UpdateHash",
+        description="SHA-256 of the last time the data in the feed was updated",
+    )
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from models.feed_index_cache import FeedIndexCache
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import MacSofaFeed, SecurityRelease
+
+_index_cache: FeedIndexCache[SofaFeedIndex] = FeedIndexCache()
+
+
+class SofaFeedIndex:
+    """Lookup tables over a SOFA feed's release history, built once per feed UpdateHash.
+
+    Answers questions such as which release first fixed a CVE, whether a build is still current, or which releases of
+    a major version fixed actively exploited CVEs, without walking every OS version's security releases.
+    """
+
+    def __init__(self, feed: MacSofaFeed):
+        self.update_hash = feed.update_hash
+        self.releases_by_version: Dict[str, SecurityRelease] = {}
+        self.major_by_version: Dict[str, str] = {}
+        self.version_by_build: Dict[str, str] = {}
+        self.current_versions: Set[str] = set()
+        self.fixes_by_cve: Dict[str, List[SecurityRelease]] = {}
+        self.actively_exploited_cves: Set[str] = set()
+
+        for os_version in feed.os_versions:
+            major = os_version.latest.product_version.split(".")[0]
+            self.current_versions.add(os_version.latest.product_version)
+            self.version_by_build[os_version.latest.build] = os_version.latest.product_version
+
+            for release in os_version.security_releases:
+                self.releases_by_version.setdefault(release.product_version, release)
+                self.major_by_version.setdefault(release.product_version, major)
+                for cve in release.cves:
+                    self.fixes_by_cve.setdefault(cve, []).append(release)
+                self.actively_exploited_cves.update(release.actively_exploited_cves)
+
+        installers = [feed.installation_apps.latest_uma, *feed.installation_apps.all_previous_uma]
+        for uma in installers:
+            self.version_by_build.setdefault(uma.build, uma.version)
+
+        for releases in self.fixes_by_cve.values():
+            releases.sort(key=lambda release: release.release_date)
+
+    @classmethod
+    def for_feed(cls, feed: MacSofaFeed) -> SofaFeedIndex:
+        """Returns the index for a feed, reusing the one already built for the same UpdateHash if present.
+
+        Args:
+            feed (MacSofaFeed): The feed to index.
+
+        Returns:
+            SofaFeedIndex: The feed's index.
+        """
+        return _index_cache.get(feed, cls)
+
+    def release(self, version_or_build: str) -> Optional[SecurityRelease]:
+        """Finds the security release for a product version, for example '14.4.1', or a build, for example '23E224'.
+
+        Returns:
+            Optional[SecurityRelease]: The release, or None if it isn't in the feed.
+        """
+        version = self.version_by_build.get(version_or_build, version_or_build)
+        return self.releases_by_version.get(version)
+
+    def is_current(self, version_or_build: str) -> bool:
+        """Checks whether a product version or build is the latest release of its major version."""
+        return self.version_by_build.get(version_or_build, version_or_build) in self.current_versions
+
+    def fixes(self, cve: str) -> List[SecurityRelease]:
+        """Lists every release that fixed a CVE, oldest first."""
+        return self.fixes_by_cve.get(cve, [])
+
+    def first_fix(self, cve: str) -> Optional[SecurityRelease]:
+        """Finds the first release that fixed a CVE, or None if no release in the feed lists it."""
+        fixes = self.fixes(cve)
+        return fixes[0] if fixes else None
+
+    def is_actively_exploited(self, cve: str) -> bool:
+        return cve in self.actively_exploited_cves
+
+    def actively_exploited_releases(self, major: Optional[str] = None) -> List[SecurityRelease]:
+        """Lists releases that fixed actively exploited CVEs, in feed order.
+
+        Args:
+            major (Optional[str]): Only include releases of this major version, for example '14'.
+
+        Returns:
+            List[SecurityRelease]: The matching releases.
+        """
+        return [
+            release
+            for version, release in self.releases_by_version.items()
+            if release.actively_exploited_cves and (major is None or self.major_by_version[version] == major)
+        ]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from datetime import date
+from functools import lru_cache
+from string import Formatter
+from typing import TYPE_CHECKING, Callable, Dict, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from models.nudge_config import NudgeConfig
+
+DEFAULT_LANGUAGE = "en"
+TEMPLATE_FIELDS = ("", "0", "install_deadline")
+
+
+class DateFormat(NamedTuple):
+    pattern: str
+    weekdays: Tuple[str, ...]
+    months: Tuple[str, ...]
+    ordinal_days: Optional[Tuple[int, ...]] = None  # Days written as ordinals, or None for every day
+
+
+# Long date formats, keyed by language. Languages without an entry use English.
+DATE_FORMATS: Dict[str, DateFormat] = {
+    "en": DateFormat(
+        "{weekday}, {month} {day}, {year}",
+        ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"),
+        (
+            "January", "February", "March", "April", "May", "June",
+            "July", "August", "September", "October", "November", "December",
+        ),
+    ),
+    "de": DateFormat(
+        "{weekday}, {day} {month} {year}",
+        ("Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"),
+        (
+            "Januar", "Februar", "März", "April", "Mai", "Juni",
+            "Juli", "August", "September", "Oktober", "November", "Dezember",
+        ),
+    ),
+    "fr": DateFormat(
+        "{weekday} {day} {month} {year}",
+        ("lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"),
+        (
+            "janvier", "février", "mars", "avril", "mai", "juin",
+            "juillet", "août", "septembre", "octobre", "novembre", "décembre",
+        ),
+        ordinal_days=(1,),
+    ),
+    "es": DateFormat(
+        "{weekday}, {day} de {month} de {year}",
+        ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"),
+        (
+            "enero", "febrero", "marzo", "abril", "mayo", "junio",
+            "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+        ),
+        ordinal_days=(),
+    ),
+    "it": DateFormat(
+        "{weekday} {day} {month} {year}",
+        ("lunedì", "martedì", "mercoledì", "giovedì", "venerdì", "sabato", "domenica"),
+        (
+            "gennaio", "febbraio", "marzo", "aprile", "maggio", "giugno",
+            "luglio", "agosto", "settembre", "ottobre", "novembre", "dicembre",
+        ),
+        ordinal_days=(),
+    ),
+    "nl": DateFormat(
+        "{weekday} {day} {month} {year}",
+        ("maandag", "dinsdag", "woensdag", "donderdag", "vrijdag", "zaterdag", "zondag"),
+        (
+            "januari", "februari", "maart", "april", "mei", "juni",
+            "juli", "augustus", "september", "oktober", "november", "december",
+        ),
+        ordinal_days=(),
+    ),
+    "pt": DateFormat(
+        "{weekday}, {day} de {month} de {year}",
+        ("segunda-feira", "terça-feira", "quarta-feira", "quinta-feira", "sexta-feira", "sábado", "domingo"),
+        (
+            "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+            "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+        ),
+        ordinal_days=(),
+    ),
+    "ja": DateFormat(
+        "{year}年{month}{day}日{weekday}",
+        ("月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日", "日曜日"),
+        tuple(f"{month}月" for month in range(1, 13)),
+        ordinal_days=(),
+    ),
+}  # fmt: skip
+
+
+def base_language(language: Optional[str]) -> str:
+    """Reduces a locale such as 'pt_BR' or 'en-GB' to its language, for example 'pt'."""
+    return (language or DEFAULT_LANGUAGE).replace("-", "_").split("_")[0].lower()
+
+
+@lru_cache(maxsize=None)
+def compile_template(template: str) -> Callable[[str], str]:
+    """Parses a note template once, checking its placeholders, and returns a function that renders it.
+
+    Templates can place the deadline with '{}', '{0}' or '{install_deadline}'.
+
+    Args:
+        template (str): The note template.
+
+    Returns:
+        Callable[[str], str]: Renders the template for a formatted deadline.
+    """
+    for _, field, _, _ in Formatter().parse(template):
+        if field is not None and field not in TEMPLATE_FIELDS:
+            raise ValueError(f"Unsupported placeholder {{{field}}} in note template {template!r}")
+
+    return lambda deadline: template.format(deadline, install_deadline=deadline)
+
+
+@lru_cache(maxsize=256)
+def ordinal(day: int, language: str) -> str:
+    """Writes a day of the month as an ordinal number in a language, for example '31st' or '31.'."""
+    from num2words import num2words
+
+    try:
+        return num2words(day, to="ordinal_num", lang=language)
+    except NotImplementedError:
+        return str(day)
+
+
+@lru_cache(maxsize=256)
+def format_deadline(deadline: date, language: Optional[str] = None) -> str:
+    """Formats an installation deadline as a long date in a language, for example 'Friday, October 31st, 2026'.
+
+    Args:
+        deadline (date): The installation deadline.
+        language (Optional[str]): The _language of the update element. Defaults to English.
+
+    Returns:
+        str: The formatted date.
+    """
+    language = base_language(language)
+    date_format = DATE_FORMATS.get(language)
+    if date_format is None:
+        language, date_format = DEFAULT_LANGUAGE, DATE_FORMATS[DEFAULT_LANGUAGE]
+
+    day = str(deadline.day)
+    if date_format.ordinal_days is None or deadline.day in date_format.ordinal_days:
+        day = ordinal(deadline.day, language)
+
+    return date_format.pattern.format(
+        weekday=date_format.weekdays[deadline.weekday()],
+        month=date_format.months[deadline.month - 1],
+        day=day,
+        year=deadline.year,
+    )
+
+
+def render_notes(config: NudgeConfig, deadline: date) -> int:
+    """Renders the installation deadline into the mainContentNote of every update element that has a template: the
+    template for its _language in note_templates, or note_template for the first element.
+
+    Args:
+        config (NudgeConfig): Nudge config object to be updated.
+        deadline (date): The installation deadline.
+
+    Returns:
+        int: The number of update elements rendered.
+    """
+    if config.metadata is None or config.user_interface is None or not config.user_interface.update_elements:
+        return 0
+
+    templates = config.metadata.note_templates or {}
+    rendered = 0
+    for index, element in enumerate(config.user_interface.update_elements):
+        language = element.field_language
+        template = templates.get(language) if language else None
+        if template is None and language:
+            template = templates.get(base_language(language))
+        if template is None and index == 0:
+            template = config.metadata.note_template
+        if template is None:
+            continue
+
+        element.main_content_note = compile_template(template)(format_deadline(deadline, language))
+        rendered += 1
+
+    return rendered
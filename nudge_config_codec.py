@@ -0,0 +1,106 @@
+"""JSON codecs for Nudge configurations.
+
+Nudge configurations are loaded and written in two ways, which must produce identical results:
+
+- pydantic: NudgeConfig.model_validate_json and NudgeConfig.model_dump_json(indent=4, exclude_none=True,
+  by_alias=True). Always available.
+- orjson: orjson parses the document and pydantic validates the resulting objects, and for dumping, orjson encodes
+  pydantic's model_dump output, re-indented from orjson's 2-space indent to the 4 spaces configs are written with.
+  Optional: orjson is listed in requirements-optional.txt, and every codec falls back to pydantic without it.
+
+Loading through orjson is the faster path. Dumping through orjson is not, because pydantic's own serializer still
+has to run to produce the objects orjson encodes, so the default "auto" codec uses orjson for loading and pydantic for
+dumping. AUTO_NUDGE_JSON_CODEC set to "orjson" or "pydantic" forces one codec for both. The checks.codec_equivalence
+check verifies the two paths agree.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    from models.nudge_config import NudgeConfig
+
+CODECS = ("auto", "orjson", "pydantic")
+JSON_CODEC = os.getenv("AUTO_NUDGE_JSON_CODEC") or "auto"
+INDENT = 4
+MAX_INDENT_DEPTH = 32
+
+
+def _use_orjson(operation: str, codec: str) -> bool:
+    if codec not in CODECS:
+        raise ValueError(f"Unknown JSON codec {codec!r}, expected one of {', '.join(CODECS)}")
+
+    return orjson is not None and (codec == "orjson" or (codec == "auto" and operation == "load"))
+
+
+def reindent(data: bytes) -> bytes:
+    """Converts JSON indented by 2 spaces per level to 4 spaces per level.
+
+    orjson escapes newlines inside strings, so every raw newline is followed by indentation only. Passing through the
+    depths from the outermost in, each pass adds 2 spaces to every line at or below that depth.
+
+    Args:
+        data (bytes): JSON encoded with orjson.OPT_INDENT_2.
+
+    Returns:
+        bytes: The same JSON indented by 4 spaces.
+    """
+    for depth in range(1, MAX_INDENT_DEPTH + 1):
+        # Lines at this depth or deeper have 2 * depth original spaces, plus 2 for every pass so far
+        prefix = b"\n" + b" " * (4 * depth - 2)
+        if prefix not in data:
+            break
+        data = data.replace(prefix, prefix + b"  ")
+
+    return data
+
+
+def loads_nudge_config(data: bytes, codec: str = JSON_CODEC) -> NudgeConfig:
+    """Parses and strictly validates a Nudge configuration.
+
+    Documents orjson can't parse are handed to pydantic, so malformed input raises the same ValidationError whichever
+    codec is used.
+
+    Args:
+        data (bytes): The configuration file's contents.
+        codec (str): "auto", "orjson" or "pydantic". Defaults to AUTO_NUDGE_JSON_CODEC.
+
+    Returns:
+        NudgeConfig: The validated configuration.
+    """
+    from models.nudge_config import NudgeConfig
+
+    if _use_orjson("load", codec):
+        try:
+            document = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+        else:
+            return NudgeConfig.model_validate(document, strict=True)
+
+    return NudgeConfig.model_validate_json(data, strict=True)
+
+
+def dumps_nudge_config(config: NudgeConfig, codec: str = JSON_CODEC) -> bytes:
+    """Serializes a Nudge configuration the way configuration files are written: by alias, without unset optional
+    values, indented by 4 spaces, with non-ASCII characters such as emoji written as UTF-8.
+
+    Args:
+        config (NudgeConfig): The configuration to serialize.
+        codec (str): "auto", "orjson" or "pydantic". Defaults to AUTO_NUDGE_JSON_CODEC.
+
+    Returns:
+        bytes: The UTF-8 encoded configuration.
+    """
+    if _use_orjson("dump", codec):
+        document = config.model_dump(exclude_none=True, by_alias=True)
+        return reindent(orjson.dumps(document, option=orjson.OPT_INDENT_2))
+
+    return config.model_dump_json(indent=INDENT, exclude_none=True, by_alias=True).encode("utf-8")
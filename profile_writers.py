@@ -0,0 +1,172 @@
+"""Writers for Nudge configurations as property lists and configuration profiles.
+
+Macs that receive Nudge preferences as a managed profile read the same keys as the JSON configuration, inside a
+com.github.macadmins.Nudge payload. The XML writers here walk the NudgeConfig model directly, yielding the document
+in chunks as they go rather than converting the model to a dict first. Their output matches plistlib's XML format
+with keys in model field order. Auto-Nudge's own metadata section is left out of both formats.
+
+Profiles are written unsigned, with UUIDs derived from their identifier so they only change when the configuration
+does, ready to be signed by whatever signs the rest of the fleet's profiles.
+"""
+
+from __future__ import annotations
+
+import plistlib
+import re
+import uuid
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Tuple
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from models.nudge_config import NudgeConfig
+
+PLIST_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">\n'
+    '<plist version="1.0">\n'
+)
+PLIST_FOOTER = "</plist>\n"
+NUDGE_PAYLOAD_TYPE = "com.github.macadmins.Nudge"
+EXCLUDED_FIELDS = frozenset({"metadata"})
+
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class PlistItems(list):
+    """Key and value pairs written as a plist dict, in order. Values are written as they are reached, so a model can
+    be chained into the pairs without being converted first."""
+
+
+def _escape(text: str) -> str:
+    # Same rules as plistlib, which rejects control characters and normalizes line endings
+    if _CONTROL_CHARACTERS.search(text):
+        raise ValueError("strings can't contain control characters; use bytes instead")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def model_items(model: BaseModel, exclude: Iterable[str] = ()) -> Iterator[Tuple[str, Any]]:
+    """Yields a model's fields as (alias, value) pairs, skipping unset optional values, like model_dump(by_alias=True,
+    exclude_none=True) does."""
+    for name, field in type(model).model_fields.items():
+        if name in exclude:
+            continue
+        value = getattr(model, name)
+        if value is not None:
+            yield field.alias or name, value
+
+
+def iter_plist_value(value: Any, depth: int = 0) -> Iterator[str]:
+    """Yields the XML plist elements for a value, one line at a time.
+
+    Args:
+        value (Any): A model, PlistItems, dict, list, str, bool or int.
+        depth (int): Indentation depth of the value.
+
+    Returns:
+        Iterator[str]: The lines of the value, each ending in a newline.
+    """
+    indent = "\t" * depth
+    if isinstance(value, BaseModel):
+        value = PlistItems(model_items(value))
+    elif isinstance(value, dict):
+        value = PlistItems((key, item) for key, item in value.items() if item is not None)
+
+    if isinstance(value, PlistItems):
+        if not value:
+            yield f"{indent}<dict/>\n"
+            return
+        yield f"{indent}<dict>\n"
+        for key, item in value:
+            yield f"{indent}\t<key>{_escape(key)}</key>\n"
+            yield from iter_plist_value(item, depth + 1)
+        yield f"{indent}</dict>\n"
+    elif isinstance(value, list):
+        if not value:
+            yield f"{indent}<array/>\n"
+            return
+        yield f"{indent}<array>\n"
+        for item in value:
+            yield from iter_plist_value(item, depth + 1)
+        yield f"{indent}</array>\n"
+    elif isinstance(value, str):
+        yield f"{indent}<string>{_escape(value)}</string>\n"
+    elif isinstance(value, bool):
+        yield f"{indent}<true/>\n" if value else f"{indent}<false/>\n"
+    elif isinstance(value, int):
+        yield f"{indent}<integer>{value}</integer>\n"
+    else:
+        raise TypeError(f"Unsupported plist value type {type(value).__name__}")
+
+
+def iter_plist(config: NudgeConfig) -> Iterator[str]:
+    """Streams a Nudge configuration as an XML property list."""
+    yield PLIST_HEADER
+    yield from iter_plist_value(PlistItems(model_items(config, EXCLUDED_FIELDS)))
+    yield PLIST_FOOTER
+
+
+def iter_mobileconfig(config: NudgeConfig, identifier: str, display_name: str = "Nudge") -> Iterator[str]:
+    """Streams a Nudge configuration as an unsigned configuration profile holding a single Nudge payload.
+
+    Args:
+        config (NudgeConfig): The configuration to write.
+        identifier (str): PayloadIdentifier of the profile. The payload's identifier and both UUIDs derive from it.
+        display_name (str): PayloadDisplayName of the profile.
+
+    Returns:
+        Iterator[str]: The profile, in chunks.
+    """
+    payload_identifier = f"{identifier}.{NUDGE_PAYLOAD_TYPE}"
+    payload = PlistItems(
+        chain(
+            [
+                ("PayloadDisplayName", display_name),
+                ("PayloadIdentifier", payload_identifier),
+                ("PayloadType", NUDGE_PAYLOAD_TYPE),
+                ("PayloadUUID", str(uuid.uuid5(uuid.NAMESPACE_DNS, payload_identifier)).upper()),
+                ("PayloadVersion", 1),
+            ],
+            model_items(config, EXCLUDED_FIELDS),
+        )
+    )
+    profile = PlistItems(
+        [
+            ("PayloadContent", [payload]),
+            ("PayloadDisplayName", display_name),
+            ("PayloadIdentifier", identifier),
+            ("PayloadScope", "System"),
+            ("PayloadType", "Configuration"),
+            ("PayloadUUID", str(uuid.uuid5(uuid.NAMESPACE_DNS, identifier)).upper()),
+            ("PayloadVersion", 1),
+        ]
+    )
+
+    yield PLIST_HEADER
+    yield from iter_plist_value(profile)
+    yield PLIST_FOOTER
+
+
+def dumps_plist(config: NudgeConfig, binary: bool = False) -> bytes:
+    """Serializes a Nudge configuration as a property list.
+
+    Args:
+        config (NudgeConfig): The configuration to serialize.
+        binary (bool): Write a binary property list. Binary plists are built by plistlib, which needs the whole
+            configuration as a dict first.
+
+    Returns:
+        bytes: The property list.
+    """
+    if binary:
+        document = config.model_dump(by_alias=True, exclude_none=True, exclude=set(EXCLUDED_FIELDS))
+        return plistlib.dumps(document, fmt=plistlib.FMT_BINARY, sort_keys=False)
+
+    return "".join(iter_plist(config)).encode("utf-8")
+
+
+def dumps_mobileconfig(config: NudgeConfig, identifier: str, display_name: str = "Nudge") -> bytes:
+    """Serializes a Nudge configuration as an unsigned configuration profile. See iter_mobileconfig."""
+    return "".join(iter_mobileconfig(config, identifier, display_name)).encode("utf-8")
@@ -0,0 +1,338 @@
+"""Replays historical SOFA feed revisions through the update pipeline with a simulated clock.
+
+Feed revisions are read from a directory: either a feed history (see feed_history.FeedHistoryStore), ordered by when
+each revision was recorded, or plain SOFA feed JSON files (optionally gzip or zstd compressed), ordered by their
+newest release date. The clock then advances one scheduled run at a time, and each run goes through the same blackout
+check, should_update_config() and update_config() as main.py. Every combination of the given deadline offsets and
+blackout windows is replayed as a separate scenario in a process pool, and the result is a timeline of the configs
+each scenario would have produced.
+
+    python replay.py .auto_nudge_history --config v1/nudge_config.json --deadline-days 14 10 --output timeline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+import main
+from feed_history import FeedHistoryStore
+from file_utils import COMPRESSED_SUFFIX, LEGACY_COMPRESSED_SUFFIX, decompress, write_atomic
+from models.sofa_feed_header import SofaFeedHeader
+from nudge_config_codec import dumps_nudge_config
+
+if TYPE_CHECKING:
+    from models.macos_sofa_feed import SofaFeed
+
+FEED_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+_snapshots: List[Snapshot] = []
+_feeds: Dict[str, SofaFeed] = {}
+
+
+class Snapshot(NamedTuple):
+    seen_at: datetime
+    update_hash: str
+    raw: bytes
+
+
+class Scenario(NamedTuple):
+    name: str
+    deadline_days: int
+    exploited_deadline_days: int
+    blackouts: Optional[Tuple[Tuple[str, str, str], ...]] = None  # None keeps the config's own blackout periods
+
+
+class RequirementState(BaseModel):
+    targeted_os_versions_rule: Optional[str] = Field(None, description="The requirement's targetedOSVersionsRule.")
+    required_minimum_os_version: Optional[str] = Field(None, description="The targeted version after the run.")
+    required_installation_date: Optional[str] = Field(None, description="The deadline after the run.")
+
+
+class ReplayEvent(BaseModel):
+    at: str = Field(..., description="Simulated time of the run.")
+    update_hash: str = Field(..., description="UpdateHash of the feed revision the run saw.")
+    status: str = Field(..., description="One of 'updated', 'unchanged' or 'blackout'.")
+    detail: Optional[str] = Field(None, description="The blackout comment, for runs skipped by a blackout.")
+    requirements: List[RequirementState] = Field(default_factory=list, description="Requirements after the run.")
+    config: Optional[str] = Field(None, description="The full configuration produced, if requested.")
+
+
+class ReplayResult(BaseModel):
+    config_path: str = Field(..., description="The Nudge configuration replayed.")
+    scenario: str = Field(..., description="Name of the scenario.")
+    deadline_days: int = Field(..., description="Days given to install a new release.")
+    exploited_deadline_days: int = Field(..., description="Days given when the release fixes an exploited CVE.")
+    updates: int = Field(0, description="Number of runs that changed the configuration.")
+    blackout_deferrals: int = Field(0, description="Number of feed revisions first seen during a blackout.")
+    mean_lag_hours: Optional[float] = Field(
+        None, description="Mean time from a revision appearing to the config being updated for it."
+    )
+    events: List[ReplayEvent] = Field(default_factory=list, description="Every run that saw a new feed revision.")
+
+
+def feed_release_time(raw: bytes) -> Optional[datetime]:
+    """Finds the newest Latest.ReleaseDate in a feed, used as its time when the feed wasn't recorded with one."""
+    document = json.loads(raw)
+    dates = [os_version["Latest"]["ReleaseDate"] for os_version in document.get("OSVersions", [])]
+    if not dates:
+        return None
+
+    return max(datetime.strptime(value, FEED_DATE_FORMAT) for value in dates)
+
+
+def load_snapshots(directory: str) -> List[Snapshot]:
+    """Reads every feed revision in a feed history or a directory of feed files, oldest first.
+
+    Args:
+        directory (str): Feed history directory, or directory of SOFA feed JSON files.
+
+    Returns:
+        List[Snapshot]: One snapshot per distinct UpdateHash.
+    """
+    snapshots: List[Snapshot] = []
+    if (Path(directory) / FeedHistoryStore.INDEX_FILE).is_file():
+        history = FeedHistoryStore(directory)
+        for entry in history.entries():
+            raw = json.dumps(history.get_json(entry["hash"]), ensure_ascii=False).encode("utf-8")
+            seen_at = datetime.fromisoformat(entry["recorded_at"]).replace(tzinfo=None)
+            snapshots.append(Snapshot(seen_at, entry["hash"], raw))
+    else:
+        for path in sorted(Path(directory).iterdir()):
+            if not path.name.endswith((".json", f".json{COMPRESSED_SUFFIX}", f".json{LEGACY_COMPRESSED_SUFFIX}")):
+                continue
+            raw = decompress(path.read_bytes())
+            update_hash = SofaFeedHeader.model_validate_json(raw).update_hash
+            seen_at = feed_release_time(raw) or datetime.fromtimestamp(path.stat().st_mtime)
+            snapshots.append(Snapshot(seen_at, update_hash, raw))
+
+    unique: Dict[str, Snapshot] = {}
+    for snapshot in sorted(snapshots, key=lambda snapshot: snapshot.seen_at):
+        unique.setdefault(snapshot.update_hash, snapshot)
+
+    return list(unique.values())
+
+
+def parse_blackouts(value: str) -> Optional[Tuple[Tuple[str, str, str], ...]]:
+    """Parses a blackout window set such as '12/15-01/05,07/01-07/14', or 'none' for no blackouts. 'config' keeps
+    the configuration's own blackout periods."""
+    if value == "config":
+        return None
+    if value == "none":
+        return ()
+
+    periods = []
+    for window in value.split(","):
+        start, end = window.strip().split("-")
+        periods.append((start, end, f"Replay blackout {start}-{end}"))
+
+    return tuple(periods)
+
+
+def _init_worker(snapshots: List[Snapshot]) -> None:
+    global _snapshots
+
+    _snapshots = snapshots
+    _feeds.clear()
+
+
+def _get_feed(snapshot: Snapshot) -> SofaFeed:
+    feed = _feeds.get(snapshot.update_hash)
+    if feed is None:
+        feed = _feeds[snapshot.update_hash] = main.get_feed_model(slim=True).model_validate_json(snapshot.raw)
+
+    return feed
+
+
+def replay(config_path: str, scenario: Scenario, interval: timedelta, include_configs: bool = False) -> ReplayResult:
+    """Replays every feed revision through one configuration and scenario, one scheduled run at a time.
+
+    Args:
+        config_path (str): The Nudge configuration to replay.
+        scenario (Scenario): Deadline offsets and blackout windows to use.
+        interval (timedelta): Time between scheduled runs.
+        include_configs (bool): Keep the full configuration produced by each update.
+
+    Returns:
+        ReplayResult: The timeline of the replay.
+    """
+    from models.nudge_config import BlackoutPeriod
+
+    result = ReplayResult(
+        config_path=config_path,
+        scenario=scenario.name,
+        deadline_days=scenario.deadline_days,
+        exploited_deadline_days=scenario.exploited_deadline_days,
+    )
+    if not _snapshots:
+        return result
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        config = main.get_nudge_config(config_path)
+        if scenario.blackouts is not None:
+            config.metadata.blackout_periods = [
+                BlackoutPeriod(start=start, end=end, comment=comment) for start, end, comment in scenario.blackouts
+            ]
+
+        last_hash = None
+        deferred_hash = None
+        lags: List[float] = []
+        position = 0
+        now = _snapshots[0].seen_at
+        while now <= _snapshots[-1].seen_at + interval:
+            while position + 1 < len(_snapshots) and _snapshots[position + 1].seen_at <= now:
+                position += 1
+            snapshot = _snapshots[position]
+            if snapshot.update_hash == last_hash:
+                now += interval
+                continue
+
+            in_blackout, reason = main.is_within_blackout(config, now)
+            if in_blackout:
+                if deferred_hash != snapshot.update_hash:
+                    deferred_hash = snapshot.update_hash
+                    result.blackout_deferrals += 1
+                    result.events.append(
+                        ReplayEvent(
+                            at=now.isoformat(), update_hash=snapshot.update_hash, status="blackout", detail=reason
+                        )
+                    )
+                now += interval
+                continue
+
+            feed = _get_feed(snapshot)
+            status = "unchanged"
+            if main.should_update_config(feed, config):
+                main.update_config(
+                    feed,
+                    config,
+                    now=now,
+                    deadline_offset=timedelta(days=scenario.deadline_days),
+                    exploited_deadline_offset=timedelta(days=scenario.exploited_deadline_days),
+                )
+                status = "updated"
+                result.updates += 1
+                lags.append((now - snapshot.seen_at).total_seconds() / 3600)
+
+            result.events.append(
+                ReplayEvent(
+                    at=now.isoformat(),
+                    update_hash=snapshot.update_hash,
+                    status=status,
+                    requirements=[
+                        RequirementState(
+                            targeted_os_versions_rule=requirement.targeted_os_versions_rule,
+                            required_minimum_os_version=requirement.required_minimum_os_version,
+                            required_installation_date=requirement.required_installation_date,
+                        )
+                        for requirement in config.os_version_requirements
+                    ],
+                    config=(
+                        dumps_nudge_config(config).decode("utf-8") if include_configs and status == "updated" else None
+                    ),
+                )
+            )
+            last_hash = snapshot.update_hash
+            now += interval
+
+    if lags:
+        result.mean_lag_hours = round(sum(lags) / len(lags), 2)
+
+    return result
+
+
+def run_replays(
+    snapshots: List[Snapshot],
+    config_paths: List[str],
+    scenarios: List[Scenario],
+    interval: timedelta,
+    include_configs: bool = False,
+    workers: Optional[int] = None,
+) -> List[ReplayResult]:
+    """Replays every configuration under every scenario, spread across a process pool. Each worker validates a feed
+    revision at most once, however many replays it runs.
+
+    Args:
+        snapshots (List[Snapshot]): Feed revisions, oldest first.
+        config_paths (List[str]): The Nudge configurations to replay.
+        scenarios (List[Scenario]): The scenarios to replay each configuration under.
+        interval (timedelta): Time between scheduled runs.
+        include_configs (bool): Keep the full configuration produced by each update.
+        workers (Optional[int]): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        List[ReplayResult]: One result per configuration and scenario.
+    """
+    tasks = list(itertools.product(config_paths, scenarios))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(snapshots,)) as pool:
+        futures = [pool.submit(replay, path, scenario, interval, include_configs) for path, scenario in tasks]
+        return [future.result() for future in futures]
+
+
+def main_cli(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("snapshots", help="Feed history directory, or directory of SOFA feed JSON files")
+    parser.add_argument("--config", nargs="+", default=[main.NUDGE_CONFIG_PATH], help="Nudge configurations to replay")
+    parser.add_argument("--deadline-days", type=int, nargs="+", default=[main.DEADLINE_OFFSET.days])
+    parser.add_argument("--exploited-deadline-days", type=int, nargs="+", default=[main.EXPLOITED_DEADLINE_OFFSET.days])
+    parser.add_argument(
+        "--blackouts",
+        nargs="+",
+        default=["config"],
+        help="Blackout window sets, for example '12/15-01/05,07/01-07/14'. 'none' for no blackouts, 'config' for "
+        "the configuration's own",
+    )
+    parser.add_argument("--interval-hours", type=float, default=24, help="Time between simulated scheduled runs")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    parser.add_argument("--output", help="Write the timelines as JSON to this path")
+    parser.add_argument("--include-configs", action="store_true", help="Include each produced config in the output")
+    args = parser.parse_args(argv)
+
+    snapshots = load_snapshots(args.snapshots)
+    if not snapshots:
+        print(f"No SOFA feed revisions found in {args.snapshots}")
+        return 1
+    print(f"Replaying {len(snapshots)} SOFA feed revisions from {snapshots[0].seen_at} to {snapshots[-1].seen_at}")
+
+    scenarios = [
+        Scenario(
+            f"deadline={deadline}d exploited={exploited}d blackouts={blackouts}",
+            deadline,
+            exploited,
+            parse_blackouts(blackouts),
+        )
+        for deadline, exploited, blackouts in itertools.product(
+            args.deadline_days, args.exploited_deadline_days, args.blackouts
+        )
+    ]
+    results = run_replays(
+        snapshots, args.config, scenarios, timedelta(hours=args.interval_hours), args.include_configs, args.workers
+    )
+
+    for result in results:
+        lag = "n/a" if result.mean_lag_hours is None else f"{result.mean_lag_hours:.1f}h"
+        print(
+            f"{result.config_path} [{result.scenario}]: {result.updates} updates, "
+            f"{result.blackout_deferrals} deferred by blackouts, mean lag {lag}"
+        )
+
+    if args.output:
+        contents = json.dumps([result.model_dump(exclude_none=True) for result in results], indent=2)
+        write_atomic(args.output, contents.encode("utf-8"))
+        print(f"Timelines written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
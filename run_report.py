@@ -0,0 +1,84 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+_active_report: Optional["RunReport"] = None
+
+
+class StageSpan(BaseModel):
+    name: str = Field(..., description="Name of the pipeline stage, for example 'feed_fetch'.")
+    duration_ms: float = Field(0.0, description="Wall-clock time spent in the stage, in milliseconds.")
+    bytes: Optional[int] = Field(None, description="Bytes read or written by the stage, where applicable.")
+    cache_hit: Optional[bool] = Field(None, description="Whether the stage was answered from a cache, if applicable.")
+    error: Optional[str] = Field(None, description="The exception that ended the stage, if any.")
+    details: Dict[str, Union[str, int, float, bool, None]] = Field(
+        default_factory=dict, description="Any other stage-specific values."
+    )
+
+
+class RunReport(BaseModel):
+    started_at: str = Field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat(),
+        description="UTC timestamp of when the run started.",
+    )
+    total_ms: float = Field(0.0, description="Wall-clock time of the whole run, in milliseconds.")
+    exit_code: Optional[int] = Field(None, description="The exit code the run ended with.")
+    stages: List[StageSpan] = Field(default_factory=list, description="Timing of each stage, in the order they ran.")
+
+    def to_markdown(self) -> str:
+        """Renders the report as a Markdown table, suitable for $GITHUB_STEP_SUMMARY."""
+        lines = [
+            "### Auto-Nudge run report",
+            "",
+            f"Total: {self.total_ms:.1f} ms, exit code {self.exit_code}",
+            "",
+            "| Stage | Time (ms) | Bytes | Cache hit | Notes |",
+            "| --- | ---: | ---: | --- | --- |",
+        ]
+        for span in self.stages:
+            notes = ", ".join(f"{key}={value}" for key, value in span.details.items())
+            if span.error:
+                notes = f"error: {span.error}" + (f", {notes}" if notes else "")
+            lines.append(
+                f"| {span.name} | {span.duration_ms:.1f} "
+                f"| {'' if span.bytes is None else span.bytes} "
+                f"| {'' if span.cache_hit is None else ('yes' if span.cache_hit else 'no')} "
+                f"| {notes} |"
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def start_report() -> RunReport:
+    """Starts a new run report and makes it the target of stage()."""
+    global _active_report
+
+    _active_report = RunReport()
+    return _active_report
+
+
+@contextmanager
+def stage(name: str) -> Iterator[StageSpan]:
+    """Times a pipeline stage, recording it on the active run report.
+
+    The yielded span can be used to record byte counts, cache hits and other details. If no report has been started,
+    the span is still timed but is not recorded anywhere.
+
+    Args:
+        name (str): Name of the pipeline stage.
+    """
+    span = StageSpan(name=name)
+    if _active_report is not None:
+        _active_report.stages.append(span)
+
+    start = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.duration_ms = (time.perf_counter() - start) * 1000